@@ -1,3 +1,4 @@
+import io
 import logging
 from typing import Dict, Any, List, Tuple, cast
 from google.adk.agents.callback_context import CallbackContext
@@ -5,21 +6,40 @@ from google.adk.models.llm_request import LlmRequest
 from google.genai import types
 from django.conf import settings
 
+from ally.ai.agents.competitor_report.prompt import context_heading, context_instructions
+
 logger = logging.getLogger(__name__)
 
 
-async def save_llm_request_callback(callback_context: CallbackContext, llm_request: LlmRequest):
+def save_llm_request_callback(callback_context: CallbackContext, llm_request: LlmRequest):
     """
     Save the LLM request to the InteractionSaver if available.
+
+    This is a plain function rather than a coroutine because it never awaits;
+    ADK accepts synchronous model callbacks, which avoids allocating and
+    scheduling a coroutine on every model call.
     """
-    # Check if interaction saving is enabled and InteractionSaver is available
+    # Return immediately unless interaction saving is enabled and the record would be emitted
+    if not (settings.AGENT_DEBUG and logger.isEnabledFor(logging.INFO)):
+        return None
+
     try:
-      if settings.AGENT_DEBUG:
-        # Extract data from session state (set by the caller)
-        request_log = _build_request_log(llm_request)
-        logger.info(f"LLM request({settings.AGENT_DEBUG}): {request_log}")
+      # The request log is only built if a handler formats the record
+      logger.info("LLM request(%s): %s", settings.AGENT_DEBUG, _LazyRequestLog(llm_request))
     except Exception as e:
-        logger.error(f"Error logging LLM request: {e}", exc_info=True)
+        logger.error("Error logging LLM request: %s", e, exc_info=True)
+
+
+class _LazyRequestLog:
+  """Defers building the request log until the log record is formatted."""
+
+  __slots__ = ("_req",)
+
+  def __init__(self, req: LlmRequest):
+    self._req = req
+
+  def __str__(self) -> str:
+    return _build_request_log(self._req)
 
 
 def _build_function_declaration_log(
@@ -45,8 +65,37 @@ def _build_function_declaration_log(
     return_str = str(func_decl.response.model_dump(exclude_none=True))
   return f"{func_decl.name}: {param_str} -> {return_str}"
 
+# Function declaration logs keyed by the tuple of declared function names.
+# An agent's tools never change, but ADK rebuilds the declaration objects for
+# every request, so the names (not the object ids) identify a tool set.
+_FUNCTION_LOG_CACHE: Dict[Tuple[str, ...], List[str]] = {}
+
+
+def _get_function_logs(function_decls: List[types.FunctionDeclaration]) -> List[str]:
+  """Returns the function declaration logs, building them once per tool set.
+
+  Args:
+    function_decls: The function declarations of the request.
+
+  Returns:
+    The function declaration logs.
+  """
+
+  key = tuple(func_decl.name for func_decl in function_decls)
+  function_logs = _FUNCTION_LOG_CACHE.get(key)
+  if function_logs is None:
+    function_logs = [
+        _build_function_declaration_log(func_decl)
+        for func_decl in function_decls
+    ]
+    _FUNCTION_LOG_CACHE[key] = function_logs
+  return function_logs
+
 _EXCLUDED_PART_FIELD = {"inline_data": {"data"}}
+# Applies the part exclusion to every element of Content.parts
+_EXCLUDED_CONTENT_FIELDS = {"parts": {"__all__": _EXCLUDED_PART_FIELD}}
 _NEW_LINE = "\n"
+_SEPARATOR = "-----------------------------------------------------------\n"
 def _build_request_log(req: LlmRequest) -> str:
   """Builds a request log.
 
@@ -61,39 +110,25 @@ def _build_request_log(req: LlmRequest) -> str:
       list[types.FunctionDeclaration],
       req.config.tools[0].function_declarations if req.config.tools else [],
   )
-  function_logs = (
-      [
-          _build_function_declaration_log(func_decl)
-          for func_decl in function_decls
-      ]
-      if function_decls
-      else []
-  )
-  contents_logs = [
-      content.model_dump_json(
-          exclude_none=True,
-          exclude={
-              "parts": {
-                  i: _EXCLUDED_PART_FIELD for i in range(len(content.parts))
-              }
-          },
-      )
-      for content in req.contents
-  ]
-
-  return f"""
-LLM Request:
------------------------------------------------------------
-System Instruction:
-{req.config.system_instruction}
------------------------------------------------------------
-Contents:
-{_NEW_LINE.join(contents_logs)}
------------------------------------------------------------
-Functions:
-{_NEW_LINE.join(function_logs)}
------------------------------------------------------------
-"""
+  function_logs = _get_function_logs(function_decls) if function_decls else []
+
+  # Write each content dump straight into the buffer instead of collecting
+  # the dumps in a list and joining them into another large string.
+  buf = io.StringIO()
+  buf.write(f"\nLLM Request:\n{_SEPARATOR}")
+  buf.write(f"System Instruction:\n{req.config.system_instruction}\n{_SEPARATOR}")
+  buf.write("Contents:\n")
+  for i, content in enumerate(req.contents):
+    if i:
+      buf.write(_NEW_LINE)
+    buf.write(
+        content.model_dump_json(exclude_none=True, exclude=_EXCLUDED_CONTENT_FIELDS)
+    )
+  buf.write(f"\n{_SEPARATOR}")
+  buf.write("Functions:\n")
+  buf.write(_NEW_LINE.join(function_logs))
+  buf.write(f"\n{_SEPARATOR}")
+  return buf.getvalue()
 
 def before_agent_callback(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -117,25 +152,18 @@ def before_agent_callback(state: Dict[str, Any]) -> Dict[str, Any]:
     # Get the current instructions
     current_instructions = state.get('instruction', '')
 
-    # Inject the product_id into the instructions
-    injected_context = f"""
-## Context for This Analysis:
-
-You are analyzing the product with ID: **{product_id}**
-
-Use the function tools available to you to:
-1. First, lookup the source product details using `lookup_product` with product_id: {product_id}
-2. Then, lookup all competitor products using `lookup_competitors` with product_id: {product_id}
-3. Analyze and generate the comprehensive comparison report
-
----
+    # The context block is already present (e.g. on a repeated invocation), so
+    # don't stack another copy on top of it
+    if context_heading in current_instructions:
+        return state
 
-"""
+    # Inject the product_id into the instructions
+    injected_context = context_instructions.format(product_id=product_id)
 
     # Prepend the context to the existing instructions
     updated_instructions = injected_context + current_instructions
     state['instruction'] = updated_instructions
 
-    logger.info(f'Injected product_id {product_id} into agent instructions')
+    logger.info('Injected product_id %s into agent instructions', product_id)
 
     return state
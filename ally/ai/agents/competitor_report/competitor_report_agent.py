@@ -1,52 +1,35 @@
 import logging
+from functools import lru_cache
 
-from django.conf import settings
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
 
-from ally.ai.agents.consts import DEFAULT_MODEL
-from ally.ai.agents.competitor_report.prompt import instructions
+from ally.ai.agents.llm import get_llm
+from ally.ai.agents.competitor_report.prompt import context_instructions, instructions
 from ally.ai.agents.competitor_report.tools import lookup_product, lookup_competitors
 from ally.ai.agents.competitor_report.callbacks import save_llm_request_callback
 
 logger = logging.getLogger(__name__)
 
 
-def competitor_report_agent(product_id: str):
+# Context block prepended to the instructions. ADK fills {product_id} from the
+# session state at request time, so the same agent can serve every product.
+contextualized_instructions = context_instructions + instructions + "\n"
+
+
+@lru_cache(maxsize=1)
+def _base_agent() -> Agent:
     """
-    Create and return a competitor report agent configured for a specific product.
+    Build the shared competitor report agent.
 
-    Args:
-        product_id: The product ID to generate a competitor report for
+    The agent holds no per-product data, so it is created once and reused.
 
     Returns:
         Configured Agent instance
     """
-    logger.info(f'Creating competitor report agent for product: {product_id}')
-
-    # Inject product_id context into instructions
-    contextualized_instructions = f"""
-## Context for This Analysis:
-
-You are analyzing the product with ID: **{product_id}**
-
-Use the function tools available to you to:
-1. First, lookup the source product details using `lookup_product` with product_id: {product_id}
-2. Then, lookup all competitor products using `lookup_competitors` with product_id: {product_id}
-3. Analyze and generate the comprehensive comparison report
-
----
-
-{instructions}
-"""
-
     # Create the agent with callable function tools
     # Google ADK expects tools to be callable functions directly
     agent = Agent(
-        model=LiteLlm(
-            model=DEFAULT_MODEL,
-            api_key=settings.GOOGLE_API_KEY
-        ),
+        model=get_llm(),
         name="competitor_report_agent",
         instruction=contextualized_instructions,
         description="An expert e-commerce product analyst that generates comprehensive competitor reports.",
@@ -56,3 +39,20 @@ Use the function tools available to you to:
 
     logger.info('Competitor report agent created successfully')
     return agent
+
+
+def competitor_report_agent(product_id: str):
+    """
+    Return the competitor report agent for a specific product.
+
+    The product ID is not baked into the agent; it is read from the session
+    state key ``product_id``, which the caller must set when creating the session.
+
+    Args:
+        product_id: The product ID to generate a competitor report for
+
+    Returns:
+        Configured Agent instance
+    """
+    logger.info('Using competitor report agent for product: %s', product_id)
+    return _base_agent()
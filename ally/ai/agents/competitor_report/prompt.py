@@ -60,3 +60,22 @@ Use clear headings, bullet points, and simpletables where appropriate to make th
 
 Focus on providing specific, data-driven insights rather than generic observations.
 """
+
+# Heading that marks the per-product context block below
+context_heading = "## Context for This Analysis:"
+
+# Per-product context block placed in front of the instructions.
+# {product_id} is filled from the session state (or by before_agent_callback).
+context_instructions = f"""
+{context_heading}
+
+You are analyzing the product with ID: **{{product_id}}**
+
+Use the function tools available to you to:
+1. First, lookup the source product details using `lookup_product` with product_id: {{product_id}}
+2. Then, lookup all competitor products using `lookup_competitors` with product_id: {{product_id}}
+3. Analyze and generate the comprehensive comparison report
+
+---
+
+"""
@@ -6,6 +6,53 @@ from ally.product_service import product_service, competitor_service, Product
 logger = logging.getLogger(__name__)
 
 
+def _add_computed_metrics(product_dict: Dict[str, Any], product: Product) -> None:
+    """
+    Add the computed length metrics used for analysis to a product dictionary.
+
+    Bullet point lengths are summed in a single pass instead of building an
+    intermediate list and walking it once per metric.
+
+    Args:
+        product_dict: The dictionary to add the metrics to
+        product: The product the metrics are computed from
+    """
+    # Read each field once
+    title = product.title
+    bullet_points = product.bullet_points or ()
+    description = product.description_filled
+
+    num_bullet_points = len(bullet_points)
+    total_bullet_chars = sum(map(len, bullet_points))
+
+    product_dict['title_length'] = len(title) if title else 0
+    product_dict['num_bullet_points'] = num_bullet_points
+    product_dict['avg_bullet_length'] = total_bullet_chars / num_bullet_points if num_bullet_points else 0
+    product_dict['total_bullet_chars'] = total_bullet_chars
+    product_dict['description_length'] = len(description) if description else 0
+
+
+def _product_dict(product: Product) -> Dict[str, Any]:
+    """
+    Convert a product to a dictionary for the agent.
+
+    Product only has flat (str, float, list) fields, so a copy of the field dict matches
+    model_dump() without the recursive serialization pass. The list fields are copied
+    too, so changes to the returned dict never reach the in-memory catalog.
+
+    Args:
+        product: The product to convert
+
+    Returns:
+        Dictionary with the product's fields
+    """
+    product_dict = dict(product.__dict__)
+    for field in ('image_url', 'bullet_points'):
+        if product_dict[field] is not None:
+            product_dict[field] = list(product_dict[field])
+    return product_dict
+
+
 def lookup_product(product_id: str) -> Dict[str, Any]:
     """
     Lookup a product by its product ID (ASIN) from the product service.
@@ -21,35 +68,24 @@ def lookup_product(product_id: str) -> Dict[str, Any]:
         Dictionary containing product information with all fields and computed metrics,
         or an error message if the product is not found
     """
-    logger.info(f'Looking up product: {product_id}')
+    logger.info('Looking up product: %s', product_id)
 
     product = product_service.get_product_by_id(product_id)
 
     if not product:
-        logger.warning(f'Product not found: {product_id}')
+        logger.warning('Product not found: %s', product_id)
         return {
             'error': f'Product with ID {product_id} not found',
             'product_id': product_id
         }
 
     # Convert product to dictionary for the agent
-    product_dict = product.model_dump()
+    product_dict = _product_dict(product)
 
     # Add some computed fields for analysis
-    product_dict['title_length'] = len(product.title) if product.title else 0
-    product_dict['num_bullet_points'] = len(product.bullet_points) if product.bullet_points else 0
-
-    if product.bullet_points:
-        bullet_lengths = [len(bp) for bp in product.bullet_points]
-        product_dict['avg_bullet_length'] = sum(bullet_lengths) / len(bullet_lengths)
-        product_dict['total_bullet_chars'] = sum(bullet_lengths)
-    else:
-        product_dict['avg_bullet_length'] = 0
-        product_dict['total_bullet_chars'] = 0
-
-    product_dict['description_length'] = len(product.description_filled) if product.description_filled else 0
+    _add_computed_metrics(product_dict, product)
 
-    logger.info(f'Successfully retrieved product: {product_id}')
+    logger.info('Successfully retrieved product: %s', product_id)
     return product_dict
 
 
@@ -71,12 +107,12 @@ def lookup_competitors(product_id: str) -> Dict[str, Any]:
         - competitors: List of competitor product dictionaries with all details and metrics
         - message: Information message if no competitors are found
     """
-    logger.info(f'Looking up competitors for product: {product_id}')
+    logger.info('Looking up competitors for product: %s', product_id)
 
     competitors = competitor_service.get_competitors_for_product(product_id)
 
     if not competitors:
-        logger.warning(f'No competitors found for product: {product_id}')
+        logger.warning('No competitors found for product: %s', product_id)
         return {
             'source_product_id': product_id,
             'num_competitors': 0,
@@ -87,21 +123,10 @@ def lookup_competitors(product_id: str) -> Dict[str, Any]:
     # Convert competitors to dictionaries with computed fields
     competitors_data = []
     for competitor in competitors:
-        comp_dict = competitor.model_dump()
+        comp_dict = _product_dict(competitor)
 
         # Add computed fields for analysis
-        comp_dict['title_length'] = len(competitor.title) if competitor.title else 0
-        comp_dict['num_bullet_points'] = len(competitor.bullet_points) if competitor.bullet_points else 0
-
-        if competitor.bullet_points:
-            bullet_lengths = [len(bp) for bp in competitor.bullet_points]
-            comp_dict['avg_bullet_length'] = sum(bullet_lengths) / len(bullet_lengths)
-            comp_dict['total_bullet_chars'] = sum(bullet_lengths)
-        else:
-            comp_dict['avg_bullet_length'] = 0
-            comp_dict['total_bullet_chars'] = 0
-
-        comp_dict['description_length'] = len(competitor.description_filled) if competitor.description_filled else 0
+        _add_computed_metrics(comp_dict, competitor)
 
         competitors_data.append(comp_dict)
 
@@ -111,5 +136,5 @@ def lookup_competitors(product_id: str) -> Dict[str, Any]:
         'competitors': competitors_data
     }
 
-    logger.info(f'Successfully retrieved {len(competitors)} competitors for product: {product_id}')
+    logger.info('Successfully retrieved %s competitors for product: %s', len(competitors), product_id)
     return result
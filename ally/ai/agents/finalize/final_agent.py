@@ -5,37 +5,36 @@ This is a Sequential Agent that orchestrates the complete product finalization p
 It runs three update agents (one for each recommendation) followed by a summarization agent.
 """
 
+from functools import lru_cache
+
 from google.adk.agents.sequential_agent import SequentialAgent
 from ally.ai.agents.finalize.subagents.update.update_product_agent import update_product_agent
 from ally.ai.agents.finalize.subagents.summarize.summarization_agent import summarization_agent
 
 
-def final_agent(product_id: str) -> SequentialAgent:
+@lru_cache(maxsize=1)
+def _final_agent() -> SequentialAgent:
     """
-    Create a sequential agent that finalizes product updates and creates a summary.
-
-    This agent orchestrates:
-    1. Update agent for recommendation #1
-    2. Update agent for recommendation #2
-    3. Update agent for recommendation #3
-    4. Summarization agent to create final report
+    Build the shared final agent and its sub-agent tree.
 
-    Args:
-        product_id: The product ID to finalize
+    None of the agents hold per-product data; the product ID comes from the session
+    state. The whole tree is built once because ADK agents can only be attached to a
+    single parent, so the cached sub-agents cannot be reused in a fresh tree.
 
     Returns:
         A SequentialAgent configured to run the complete finalization workflow
     """
 
     # Create three update agents (one for each recommendation)
-    update_agent_1 = update_product_agent(product_id, recommendation_number=1)
-    update_agent_2 = update_product_agent(product_id, recommendation_number=2)
-    update_agent_3 = update_product_agent(product_id, recommendation_number=3)
+    update_agent_1 = update_product_agent(recommendation_number=1)
+    update_agent_2 = update_product_agent(recommendation_number=2)
+    update_agent_3 = update_product_agent(recommendation_number=3)
 
     # Create the summarization agent
-    summary_agent = summarization_agent(product_id)
+    summary_agent = summarization_agent()
 
-    # Create the sequential agent with all four agents
+    # The updates run in order: recommendations often touch the same field (e.g. two
+    # title rewrites), and each one must see the product as the previous one left it
     return SequentialAgent(
         sub_agents=[
             update_agent_1,
@@ -44,5 +43,27 @@ def final_agent(product_id: str) -> SequentialAgent:
             summary_agent
         ],
         name="final_agent",
-        description=f"Sequential agent that applies all recommendations and creates a summary for product {product_id}"
+        description="Sequential agent that applies all recommendations and creates a summary for the product being finalized"
     )
+
+
+def final_agent(product_id: str) -> SequentialAgent:
+    """
+    Return the sequential agent that finalizes product updates and creates a summary.
+
+    This agent orchestrates:
+    1. Update agent for recommendation #1
+    2. Update agent for recommendation #2
+    3. Update agent for recommendation #3
+    4. Summarization agent to create final report
+
+    The agent tree is shared by all products; the product ID is read from the session
+    state key ``product_id``, which the caller must set when creating the session.
+
+    Args:
+        product_id: The product ID to finalize
+
+    Returns:
+        A SequentialAgent configured to run the complete finalization workflow
+    """
+    return _final_agent()
@@ -5,11 +5,12 @@ This agent is responsible for creating a comprehensive summary of all product up
 and the competitive analysis process.
 """
 
+from functools import lru_cache
+from typing import Optional
+
 from google.adk import Agent
-from google.adk.models.lite_llm import LiteLlm
-from django.conf import settings
 
-from ally.ai.agents.consts import DEFAULT_MODEL
+from ally.ai.agents.llm import get_llm
 from ally.ai.agents.finalize.subagents.summarize.prompt import SUMMARIZATION_PROMPT
 from ally.ai.agents.finalize.subagents.summarize.tools import (
     get_product_info,
@@ -18,32 +19,26 @@ from ally.ai.agents.finalize.subagents.summarize.tools import (
 )
 from ally.ai.agents.competitor_report.callbacks import save_llm_request_callback
 
+# The prompt's {product_id} placeholders are filled by ADK from the session state,
+# so the instruction is prepared once instead of formatted for every request.
+# The update results from previous agents will be available in the conversation history
+_INSTRUCTION = SUMMARIZATION_PROMPT.strip()
 
-def summarization_agent(product_id: str) -> Agent:
-    """
-    Create an agent that summarizes the entire product update process.
 
-    Args:
-        product_id: The product ID that was updated
+@lru_cache(maxsize=1)
+def _summarization_agent() -> Agent:
+    """
+    Build the shared summarization agent.
 
     Returns:
         An Agent configured to create a comprehensive summary
     """
 
-    # Format the prompt with the product_id
-    # The update results from previous agents will be available in the conversation history
-    prompt = SUMMARIZATION_PROMPT.format(
-        product_id=product_id
-    )
-
     return Agent(
-        model=LiteLlm(
-            model=DEFAULT_MODEL,
-            api_key=settings.GOOGLE_API_KEY
-        ),
-        instruction=prompt.strip(),
+        model=get_llm(),
+        instruction=_INSTRUCTION,
         name="summarization_agent",
-        description=f"Agent that creates a comprehensive summary for product {product_id}",
+        description="Agent that creates a comprehensive summary for the finalized product",
         tools=[
             get_product_info,
             get_competitor_report,
@@ -51,3 +46,20 @@ def summarization_agent(product_id: str) -> Agent:
         ],
         before_model_callback=save_llm_request_callback,
     )
+
+
+def summarization_agent(product_id: Optional[str] = None) -> Agent:
+    """
+    Return the agent that summarizes the entire product update process.
+
+    The agent is built once and reused for every product; the product ID is read
+    from the session state key ``product_id``. ADK agents can only have one parent,
+    so the returned instance must only be attached to the (also shared) final agent.
+
+    Args:
+        product_id: The product ID that was updated. Unused; kept for call compatibility
+
+    Returns:
+        An Agent configured to create a comprehensive summary
+    """
+    return _summarization_agent()
@@ -6,6 +6,22 @@ from ally.product_service import product_service
 from ally.services.competitor_report_service import competitor_report_service
 from ally.services.product_recommendation_service import product_recommendation_service
 
+# Pre-serialized failure response; only the error message is encoded per call
+_FAILURE_TEMPLATE = '{"result": "failure", "error": %s}'
+
+
+def _failure(error: str) -> str:
+    """
+    Build a failure response, identical to json.dumps of the equivalent dict.
+
+    Args:
+        error: The error message
+
+    Returns:
+        JSON string containing the failure result and error message
+    """
+    return _FAILURE_TEMPLATE % json.dumps(error)
+
 
 def get_product_info(product_id: str) -> str:
     """
@@ -21,10 +37,9 @@ def get_product_info(product_id: str) -> str:
         product = product_service.get_product_by_id(product_id)
 
         if not product:
-            return json.dumps({
-                "result": "failure",
-                "error": f"Product {product_id} not found"
-            })
+            return _failure(f"Product {product_id} not found")
+
+        image_url = product.image_url
 
         # Convert product to dictionary for JSON serialization
         product_data = {
@@ -35,7 +50,7 @@ def get_product_info(product_id: str) -> str:
             "category": product.retailer_category_node,
             "description": product.description_filled,
             "bullet_points": product.bullet_points,
-            "image_url": product.image_url[0] if product.image_url else None,
+            "image_url": image_url[0] if image_url else None,
             "min_rank_search": product.min_rank_search,
             "avg_rank_search": product.avg_rank_search,
             "min_rank_category": product.min_rank_category,
@@ -47,10 +62,7 @@ def get_product_info(product_id: str) -> str:
             "product": product_data
         })
     except Exception as e:
-        return json.dumps({
-            "result": "failure",
-            "error": f"Error retrieving product information: {str(e)}"
-        })
+        return _failure(f"Error retrieving product information: {str(e)}")
 
 
 def get_competitor_report(product_id: str) -> str:
@@ -72,15 +84,9 @@ def get_competitor_report(product_id: str) -> str:
                 "report": report
             })
         else:
-            return json.dumps({
-                "result": "failure",
-                "error": f"No competitor report found for product {product_id}"
-            })
+            return _failure(f"No competitor report found for product {product_id}")
     except Exception as e:
-        return json.dumps({
-            "result": "failure",
-            "error": f"Error retrieving competitor report: {str(e)}"
-        })
+        return _failure(f"Error retrieving competitor report: {str(e)}")
 
 
 def get_product_recommendations(product_id: str) -> str:
@@ -102,12 +108,6 @@ def get_product_recommendations(product_id: str) -> str:
                 "recommendations": recommendations
             })
         else:
-            return json.dumps({
-                "result": "failure",
-                "error": f"No recommendations found for product {product_id}"
-            })
+            return _failure(f"No recommendations found for product {product_id}")
     except Exception as e:
-        return json.dumps({
-            "result": "failure",
-            "error": f"Error retrieving recommendations: {str(e)}"
-        })
+        return _failure(f"Error retrieving recommendations: {str(e)}")
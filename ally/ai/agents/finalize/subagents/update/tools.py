@@ -2,11 +2,34 @@
 
 import json
 import logging
+from typing import NamedTuple, Optional
+
 from ally.product_service import product_service
 from ally.services.product_recommendation_service import product_recommendation_service
 
 logger = logging.getLogger(__name__)
 
+# Shared encoder for tool responses. Non-ASCII text (e.g. curly quotes or
+# accented brand names in listings) is emitted as-is instead of as \uXXXX
+# escapes, which keeps the payload handed back to the model shorter.
+_dump = json.JSONEncoder(ensure_ascii=False).encode
+
+# Pre-serialized failure response; only the error message is encoded per call
+_FAILURE_TEMPLATE = '{"result": "failure", "error": %s}'
+
+# Pre-serialized success response; only the message is encoded per call
+_SUCCESS_TEMPLATE = '{"result": "success", "message": %s}'
+
+
+def _failure(error: str) -> str:
+    """Build a failure response, identical to _dump of the equivalent dict."""
+    return _FAILURE_TEMPLATE % _dump(error)
+
+
+def _success(message: str) -> str:
+    """Build a success response, identical to _dump of the equivalent dict."""
+    return _SUCCESS_TEMPLATE % _dump(message)
+
 
 def get_product_recommendations(product_id: str) -> str:
     """
@@ -22,156 +45,161 @@ def get_product_recommendations(product_id: str) -> str:
         recommendations = product_recommendation_service.get_recommendations(product_id)
 
         if recommendations:
-            return json.dumps({
+            return _dump({
                 "result": "success",
                 "recommendations": recommendations
             })
         else:
             error_msg = f"No recommendations found for product {product_id}"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": error_msg
-            })
+            return _failure(error_msg)
     except Exception as e:
         error_msg = f"Error retrieving recommendations: {str(e)}"
         logger.error(error_msg)
-        return json.dumps({
-            "result": "failure",
-            "error": error_msg
-        })
-
-
-def update_product_title(product_id: str, new_title: str) -> str:
+        return _failure(error_msg)
+
+
+class _ScalarField(NamedTuple):
+    """Describes a single-value product field that the update tools can change."""
+
+    # Product attribute to update
+    attr: str
+    # Name used in error and log messages, e.g. "brand" in "Error updating brand"
+    name: str
+    # Name used in the empty-value error, e.g. "New brand name cannot be empty"
+    empty_name: str
+    # Success message; may reference the requested value as {value}
+    success_message: str
+    # Truncate old/new values in the change log (for long text fields)
+    truncate_log: bool = False
+
+
+_SCALAR_FIELDS = {
+    "title": _ScalarField(
+        attr="title",
+        name="title",
+        empty_name="title",
+        success_message="Successfully updated product title to: {value}",
+    ),
+    "description": _ScalarField(
+        attr="description_filled",
+        name="description",
+        empty_name="description",
+        success_message="Successfully updated product description",
+        truncate_log=True,
+    ),
+    "category": _ScalarField(
+        attr="retailer_category_node",
+        name="category",
+        empty_name="category",
+        success_message="Successfully updated product category to: {value}",
+    ),
+    "brand": _ScalarField(
+        attr="retailer_brand_name",
+        name="brand",
+        empty_name="brand name",
+        success_message="Successfully updated product brand to: {value}",
+    ),
+}
+
+
+def _preview(value: Optional[str]) -> Optional[str]:
+    """Truncate long values for readable log lines."""
+    return (value[:100] + '...') if value and len(value) > 100 else value
+
+
+def _update_scalar_field(product_id: str, new_value: str, field_key: str) -> str:
     """
-    Update the title of a product.
+    Update a single-value field of a product and save the change to disk.
 
     Args:
         product_id: The product ID to update
-        new_title: The new title for the product
+        new_value: The new value for the field
+        field_key: Key of the field in _SCALAR_FIELDS
 
     Returns:
         JSON string with result status
     """
+    field = _SCALAR_FIELDS[field_key]
     try:
-        logger.info(f"Attempting to update title for product {product_id}")
-        
+        logger.info("Attempting to update %s for product %s", field.name, product_id)
+
         product = product_service.get_product_by_id(product_id)
 
         if not product:
             error_msg = f"Product {product_id} not found"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": error_msg
-            })
+            return _failure(error_msg)
+
+        # Strip once and reuse the result for validation, assignment and messages
+        stripped_value = (new_value or "").strip()
 
-        if not new_title or not new_title.strip():
-            error_msg = f"Product {product_id}: New title cannot be empty"
+        if not stripped_value:
+            error_msg = f"Product {product_id}: New {field.empty_name} cannot be empty"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": "New title cannot be empty"
-            })
+            return _failure(f"New {field.empty_name} cannot be empty")
+
+        # Store old value for logging
+        old_value = getattr(product, field.attr)
 
-        # Store old title for logging
-        old_title = product.title
+        # Nothing to change (e.g. a retried tool call), so skip the save
+        if old_value == stripped_value:
+            logger.info("Product %s %s unchanged; skipping save", product_id, field.name)
+            return _success(f"Product {field.name} already matches the requested value; no change made")
 
-        # Update the product title
-        product.title = new_title.strip()
+        # Update the product field
+        setattr(product, field.attr, stripped_value)
 
         # Update product in service and save changes to disk
         try:
             product_service.update_product(product)
-            product_service.save_and_reload()
-        except Exception as save_error:
-            error_msg = f"Product {product_id}: Failed to save title changes to disk: {str(save_error)}"
+            product_service.save()
+        except (ValueError, OSError) as save_error:
+            error_msg = f"Product {product_id}: Failed to save {field.name} changes to disk: {str(save_error)}"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": f"Failed to save changes to disk: {str(save_error)}"
-            })
+            return _failure(f"Failed to save changes to disk: {str(save_error)}")
 
         # Log the successful update
-        logger.info(f"Product {product_id} title updated: '{old_title}' -> '{new_title.strip()}'")
+        if field.truncate_log:
+            # Only build the truncated previews if the record will be emitted
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Product %s %s updated: '%s' -> '%s'", product_id, field.name, _preview(old_value), _preview(stripped_value))
+        else:
+            logger.info("Product %s %s updated: '%s' -> '%s'", product_id, field.name, old_value, stripped_value)
 
-        return json.dumps({
-            "result": "success",
-            "message": f"Successfully updated product title to: {new_title}"
-        })
+        return _success(field.success_message.format(value=stripped_value))
     except Exception as e:
-        error_msg = f"Product {product_id}: Error updating title: {str(e)}"
+        error_msg = f"Product {product_id}: Error updating {field.name}: {str(e)}"
         logger.error(error_msg)
-        return json.dumps({
-            "result": "failure",
-            "error": f"Error updating title: {str(e)}"
-        })
+        return _failure(f"Error updating {field.name}: {str(e)}")
 
 
-def update_product_description(product_id: str, new_description: str) -> str:
+def update_product_title(product_id: str, new_title: str) -> str:
     """
-    Update the description of a product.
+    Update the title of a product.
 
     Args:
         product_id: The product ID to update
-        new_description: The new description for the product
+        new_title: The new title for the product
 
     Returns:
         JSON string with result status
     """
-    try:
-        product = product_service.get_product_by_id(product_id)
+    return _update_scalar_field(product_id, new_title, "title")
 
-        if not product:
-            error_msg = f"Product {product_id} not found"
-            logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": error_msg
-            })
-
-        if not new_description or not new_description.strip():
-            error_msg = f"Product {product_id}: New description cannot be empty"
-            logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": "New description cannot be empty"
-            })
 
-        # Store old description for logging
-        old_description = product.description_filled
-
-        # Update the product description
-        product.description_filled = new_description.strip()
-
-        # Update product in service and save changes to disk
-        try:
-            product_service.update_product(product)
-            product_service.save_and_reload()
-        except Exception as save_error:
-            error_msg = f"Product {product_id}: Failed to save description changes to disk: {str(save_error)}"
-            logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": f"Failed to save changes to disk: {str(save_error)}"
-            })
+def update_product_description(product_id: str, new_description: str) -> str:
+    """
+    Update the description of a product.
 
-        # Log the successful update (truncate long descriptions for readability)
-        old_desc_preview = (old_description[:100] + '...') if old_description and len(old_description) > 100 else old_description
-        new_desc_preview = (new_description[:100] + '...') if len(new_description) > 100 else new_description
-        logger.info(f"Product {product_id} description updated: '{old_desc_preview}' -> '{new_desc_preview}'")
+    Args:
+        product_id: The product ID to update
+        new_description: The new description for the product
 
-        return json.dumps({
-            "result": "success",
-            "message": f"Successfully updated product description"
-        })
-    except Exception as e:
-        error_msg = f"Product {product_id}: Error updating description: {str(e)}"
-        logger.error(error_msg)
-        return json.dumps({
-            "result": "failure",
-            "error": f"Error updating description: {str(e)}"
-        })
+    Returns:
+        JSON string with result status
+    """
+    return _update_scalar_field(product_id, new_description, "description")
 
 
 def update_product_category(product_id: str, new_category: str) -> str:
@@ -185,57 +213,7 @@ def update_product_category(product_id: str, new_category: str) -> str:
     Returns:
         JSON string with result status
     """
-    try:
-        product = product_service.get_product_by_id(product_id)
-
-        if not product:
-            error_msg = f"Product {product_id} not found"
-            logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": error_msg
-            })
-
-        if not new_category or not new_category.strip():
-            error_msg = f"Product {product_id}: New category cannot be empty"
-            logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": "New category cannot be empty"
-            })
-
-        # Store old category for logging
-        old_category = product.retailer_category_node
-
-        # Update the product category
-        product.retailer_category_node = new_category.strip()
-
-        # Update product in service and save changes to disk
-        try:
-            product_service.update_product(product)
-            product_service.save_and_reload()
-        except Exception as save_error:
-            error_msg = f"Product {product_id}: Failed to save category changes to disk: {str(save_error)}"
-            logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": f"Failed to save changes to disk: {str(save_error)}"
-            })
-
-        # Log the successful update
-        logger.info(f"Product {product_id} category updated: '{old_category}' -> '{new_category.strip()}'")
-
-        return json.dumps({
-            "result": "success",
-            "message": f"Successfully updated product category to: {new_category}"
-        })
-    except Exception as e:
-        error_msg = f"Product {product_id}: Error updating category: {str(e)}"
-        logger.error(error_msg)
-        return json.dumps({
-            "result": "failure",
-            "error": f"Error updating category: {str(e)}"
-        })
+    return _update_scalar_field(product_id, new_category, "category")
 
 
 def update_product_brand(product_id: str, new_brand: str) -> str:
@@ -249,57 +227,7 @@ def update_product_brand(product_id: str, new_brand: str) -> str:
     Returns:
         JSON string with result status
     """
-    try:
-        product = product_service.get_product_by_id(product_id)
-
-        if not product:
-            error_msg = f"Product {product_id} not found"
-            logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": error_msg
-            })
-
-        if not new_brand or not new_brand.strip():
-            error_msg = f"Product {product_id}: New brand name cannot be empty"
-            logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": "New brand name cannot be empty"
-            })
-
-        # Store old brand for logging
-        old_brand = product.retailer_brand_name
-
-        # Update the product brand
-        product.retailer_brand_name = new_brand.strip()
-
-        # Update product in service and save changes to disk
-        try:
-            product_service.update_product(product)
-            product_service.save_and_reload()
-        except Exception as save_error:
-            error_msg = f"Product {product_id}: Failed to save brand changes to disk: {str(save_error)}"
-            logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": f"Failed to save changes to disk: {str(save_error)}"
-            })
-
-        # Log the successful update
-        logger.info(f"Product {product_id} brand updated: '{old_brand}' -> '{new_brand.strip()}'")
-
-        return json.dumps({
-            "result": "success",
-            "message": f"Successfully updated product brand to: {new_brand}"
-        })
-    except Exception as e:
-        error_msg = f"Product {product_id}: Error updating brand: {str(e)}"
-        logger.error(error_msg)
-        return json.dumps({
-            "result": "failure",
-            "error": f"Error updating brand: {str(e)}"
-        })
+    return _update_scalar_field(product_id, new_brand, "brand")
 
 
 def add_bullet_point(product_id: str, bullet_point: str) -> str:
@@ -319,53 +247,45 @@ def add_bullet_point(product_id: str, bullet_point: str) -> str:
         if not product:
             error_msg = f"Product {product_id} not found"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": error_msg
-            })
+            return _failure(error_msg)
+
+        # Strip once and reuse the result for validation, the update and messages
+        bullet_to_add = (bullet_point or "").strip()
 
-        if not bullet_point or not bullet_point.strip():
+        if not bullet_to_add:
             error_msg = f"Product {product_id}: Bullet point cannot be empty"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": "Bullet point cannot be empty"
-            })
+            return _failure("Bullet point cannot be empty")
+
+        # The bullet point is already present (e.g. a retried tool call), so skip the save
+        if product.bullet_points and bullet_to_add in product.bullet_points:
+            logger.info("Product %s already has bullet point '%s'; skipping save", product_id, bullet_to_add)
+            return _success(f"Bullet point already present; no change made: {bullet_to_add}")
 
         # Initialize bullet_points if None
         if product.bullet_points is None:
             product.bullet_points = []
 
         # Add the new bullet point
-        bullet_to_add = bullet_point.strip()
         product.bullet_points.append(bullet_to_add)
 
         # Update product in service and save changes to disk
         try:
             product_service.update_product(product)
-            product_service.save_and_reload()
-        except Exception as save_error:
+            product_service.save()
+        except (ValueError, OSError) as save_error:
             error_msg = f"Product {product_id}: Failed to save bullet point changes to disk: {str(save_error)}"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": f"Failed to save changes to disk: {str(save_error)}"
-            })
+            return _failure(f"Failed to save changes to disk: {str(save_error)}")
 
         # Log the successful update
-        logger.info(f"Product {product_id} bullet point added: '{bullet_to_add}' (Total bullet points: {len(product.bullet_points)})")
+        logger.info("Product %s bullet point added: '%s' (Total bullet points: %s)", product_id, bullet_to_add, len(product.bullet_points))
 
-        return json.dumps({
-            "result": "success",
-            "message": f"Successfully added bullet point: {bullet_point}"
-        })
+        return _success(f"Successfully added bullet point: {bullet_to_add}")
     except Exception as e:
         error_msg = f"Product {product_id}: Error adding bullet point: {str(e)}"
         logger.error(error_msg)
-        return json.dumps({
-            "result": "failure",
-            "error": f"Error adding bullet point: {str(e)}"
-        })
+        return _failure(f"Error adding bullet point: {str(e)}")
 
 
 def remove_bullet_point(product_id: str, bullet_point: str) -> str:
@@ -385,64 +305,51 @@ def remove_bullet_point(product_id: str, bullet_point: str) -> str:
         if not product:
             error_msg = f"Product {product_id} not found"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": error_msg
-            })
+            return _failure(error_msg)
+
+        # Strip once and reuse the result for validation, the lookup and messages
+        bullet_to_remove = (bullet_point or "").strip()
 
-        if not bullet_point or not bullet_point.strip():
+        if not bullet_to_remove:
             error_msg = f"Product {product_id}: Bullet point cannot be empty"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": "Bullet point cannot be empty"
-            })
+            return _failure("Bullet point cannot be empty")
 
         # Check if product has bullet points
         if not product.bullet_points:
             error_msg = f"Product {product_id}: Product has no bullet points to remove"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": "Product has no bullet points to remove"
-            })
+            return _failure("Product has no bullet points to remove")
 
-        # Try to find and remove the exact bullet point
-        bullet_to_remove = bullet_point.strip()
+        # Try to find and remove the exact bullet point, scanning the list only once
+        bullets = product.bullet_points
+
+        try:
+            index = bullets.index(bullet_to_remove)
+        except ValueError:
+            index = -1
 
-        if bullet_to_remove in product.bullet_points:
-            product.bullet_points.remove(bullet_to_remove)
+        if index >= 0:
+            del bullets[index]
 
             # Update product in service and save changes to disk
             try:
                 product_service.update_product(product)
-                product_service.save_and_reload()
-            except Exception as save_error:
+                product_service.save()
+            except (ValueError, OSError) as save_error:
                 error_msg = f"Product {product_id}: Failed to save bullet point removal to disk: {str(save_error)}"
                 logger.error(error_msg)
-                return json.dumps({
-                    "result": "failure",
-                    "error": f"Failed to save changes to disk: {str(save_error)}"
-                })
+                return _failure(f"Failed to save changes to disk: {str(save_error)}")
 
             # Log the successful update
-            logger.info(f"Product {product_id} bullet point removed: '{bullet_to_remove}' (Remaining bullet points: {len(product.bullet_points)})")
+            logger.info("Product %s bullet point removed: '%s' (Remaining bullet points: %s)", product_id, bullet_to_remove, len(product.bullet_points))
 
-            return json.dumps({
-                "result": "success",
-                "message": f"Successfully removed bullet point: {bullet_point}"
-            })
+            return _success(f"Successfully removed bullet point: {bullet_to_remove}")
         else:
             error_msg = f"Product {product_id}: Cannot remove bullet point. Bullet point not found. Provided: '{bullet_to_remove}'"
             logger.error(error_msg)
-            return json.dumps({
-                "result": "failure",
-                "error": f"Cannot remove bullet point. Bullet point not found. Provided: '{bullet_to_remove}'"
-            })
+            return _failure(f"Cannot remove bullet point. Bullet point not found. Provided: '{bullet_to_remove}'")
     except Exception as e:
         error_msg = f"Product {product_id}: Error removing bullet point: {str(e)}"
         logger.error(error_msg)
-        return json.dumps({
-            "result": "failure",
-            "error": f"Error removing bullet point: {str(e)}"
-        })
+        return _failure(f"Error removing bullet point: {str(e)}")
@@ -4,11 +4,12 @@ Update Product Agent
 This agent is responsible for applying a single recommendation to a product.
 """
 
+from functools import lru_cache
+from typing import Optional
+
 from google.adk import Agent
-from google.adk.models.lite_llm import LiteLlm
-from django.conf import settings
 
-from ally.ai.agents.consts import DEFAULT_MODEL
+from ally.ai.agents.llm import get_llm
 from ally.ai.agents.finalize.subagents.update.prompt import UPDATE_PRODUCT_PROMPT
 from ally.ai.agents.finalize.subagents.update.tools import (
     get_product_recommendations,
@@ -22,32 +23,29 @@ from ally.ai.agents.finalize.subagents.update.tools import (
 from ally.ai.agents.competitor_report.callbacks import save_llm_request_callback
 
 
-def update_product_agent(product_id: str, recommendation_number: int) -> Agent:
+@lru_cache(maxsize=None)
+def _update_product_agent(recommendation_number: int) -> Agent:
     """
-    Create an agent that updates a product based on a specific recommendation.
+    Build the shared update agent for a recommendation number.
 
     Args:
-        product_id: The product ID to update
         recommendation_number: The recommendation number to apply (1, 2, or 3)
 
     Returns:
         An Agent configured to update the product
     """
-
-    # Format the prompt with the product_id and recommendation_number
+    # The product_id placeholder is kept so ADK fills it from the session state at
+    # request time
     prompt = UPDATE_PRODUCT_PROMPT.format(
-        product_id=product_id,
+        product_id='{product_id}',
         recommendation_number=recommendation_number
-    )
+    ).strip()
 
     return Agent(
-        model=LiteLlm(
-            model=DEFAULT_MODEL,
-            api_key=settings.GOOGLE_API_KEY
-        ),
-        instruction=prompt.strip(),
+        model=get_llm(),
+        instruction=prompt,
         name=f"update_product_agent_{recommendation_number}",
-        description=f"Agent that applies recommendation #{recommendation_number} to product {product_id}",
+        description=f"Agent that applies recommendation #{recommendation_number} to the product being finalized",
         tools=[
             get_product_recommendations,
             update_product_title,
@@ -60,3 +58,22 @@ def update_product_agent(product_id: str, recommendation_number: int) -> Agent:
         output_key=f"update_recommendation_{recommendation_number}_status",
         before_model_callback=save_llm_request_callback,
     )
+
+
+def update_product_agent(product_id: Optional[str] = None, recommendation_number: int = 1) -> Agent:
+    """
+    Return the agent that updates a product based on a specific recommendation.
+
+    The agent is built once per recommendation number and reused for every
+    product; the product ID is read from the session state key ``product_id``.
+    ADK agents can only have one parent, so the returned instance must only be
+    attached to the (also shared) final agent.
+
+    Args:
+        product_id: The product ID to update. Unused; kept for call compatibility
+        recommendation_number: The recommendation number to apply (1, 2, or 3)
+
+    Returns:
+        An Agent configured to update the product
+    """
+    return _update_product_agent(recommendation_number)
@@ -0,0 +1,26 @@
+from functools import lru_cache
+
+from django.conf import settings
+from google.adk.models.lite_llm import LiteLlm
+
+from ally.ai.agents.consts import DEFAULT_MODEL
+
+
+@lru_cache(maxsize=8)
+def get_llm(model: str = DEFAULT_MODEL) -> LiteLlm:
+    """
+    Return the shared LiteLlm instance for a model.
+
+    LiteLlm holds no per-request state, so one instance per model is reused by
+    every agent instead of being constructed each time an agent is built.
+
+    Args:
+        model: The LiteLLM model name, defaults to DEFAULT_MODEL
+
+    Returns:
+        The LiteLlm model wrapper for the given model
+    """
+    return LiteLlm(
+        model=model,
+        api_key=settings.GOOGLE_API_KEY
+    )
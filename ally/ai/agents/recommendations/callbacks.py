@@ -5,13 +5,18 @@ from google.adk.models.llm_request import LlmRequest
 
 logger = logging.getLogger(__name__)
 
+# State key recording the product whose context has already been injected
+_CONTEXT_INJECTED_KEY = '_recs_ctx_injected'
+
 
 def before_agent_callback(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Callback function that runs before the agent starts processing.
 
-    This callback extracts the product_id and competitor_report from the state
-    and injects them into the agent's instructions.
+    This callback extracts the product_id from the state and appends it, along
+    with whether a competitor_report is available, to the agent's instructions.
+    The context is injected at most once per product, so running the callback
+    again on the same state does not grow the instructions.
 
     Args:
         state: The agent state dictionary containing product_id and competitor_report
@@ -26,57 +31,37 @@ def before_agent_callback(state: Dict[str, Any]) -> Dict[str, Any]:
         logger.warning('No product_id found in state for recommendations agent')
         return state
 
+    if state.get(_CONTEXT_INJECTED_KEY) == product_id:
+        logger.debug(f'Context for product_id {product_id} already injected')
+        return state
+
     # Get the current instructions
     current_instructions = state.get('instruction', '')
 
-    # Inject the product_id and competitor report context
-    injected_context = f"""
-## Context for This Analysis:
-
-You are generating recommendations for product ID: **{product_id}**
-
-"""
-
-    if competitor_report:
-        injected_context += f"""
-**Competitor Analysis Report Available:**
-The competitor analysis report has been generated and is available via the `get_competitor_report` tool.
-Report preview (first 500 chars):
-{competitor_report[:500]}...
-
-"""
-    else:
-        injected_context += """
-**Note:** No competitor analysis report was found in the session. You should still generate recommendations based on AWS guidelines.
+    # Inject a minimal product context. The report itself is available through the
+    # `get_competitor_report` tool, so only its availability is mentioned here.
+    injected_context = f"product_id={product_id}; competitor_report_available={bool(competitor_report)}\n"
 
-"""
-
-    injected_context += """
-**Important Instructions:**
-1. FIRST call `get_aws_guidelines` to retrieve the AWS product listing guidelines (MANDATORY)
-2. THEN call `get_product_details` to get the current product information
-3. THEN call `get_competitor_report` to get competitive context (if available)
-4. Generate exactly 3 recommendations that primarily reference AWS guidelines
-5. Use competitor analysis as secondary supporting evidence
-
----
-
-"""
-
-    # Prepend the context to the existing instructions
-    updated_instructions = injected_context + current_instructions
+    # Append the context after the existing instructions, so the static part of the
+    # prompt stays an identical prefix across sessions (prompt cache friendly)
+    updated_instructions = current_instructions + "\n---\n" + injected_context
     state['instruction'] = updated_instructions
+    state[_CONTEXT_INJECTED_KEY] = product_id
 
     logger.info(f'Injected product_id {product_id} into recommendations agent instructions')
 
     return state
 
 
-async def save_llm_request_callback(callback_context: CallbackContext, llm_request: LlmRequest):
+def save_llm_request_callback(callback_context: CallbackContext, llm_request: LlmRequest):
     """
     Save the LLM request for debugging purposes.
+
+    This runs before every model call, so it is a plain function that returns
+    immediately unless debug logging is enabled.
     """
-    try:
-        logger.debug(f"LLM request for recommendations agent")
-    except Exception as e:
-        logger.error(f"Error logging LLM request: {e}", exc_info=True)
+    if not logger.isEnabledFor(logging.DEBUG):
+        return None
+
+    logger.debug("LLM request for %s", callback_context.agent_name)
+    return None
@@ -5,7 +5,11 @@ Your task is to generate exactly 3 actionable, specific recommendations to impro
 
 ## Your Analysis Process:
 
-1. **Retrieve AWS Product Guidelines**: Use the `get_aws_guidelines` tool to get the official Amazon Web Services product listing guidelines. These guidelines are PRIMARY and must be used to generate the recommendations.
+The AWS Product Guidelines are already loaded in your context, in the "AWS Product Guidelines" section below. Do not call the `get_aws_guidelines` tool unless that section is missing.
+
+Steps 2-3 only retrieve data and do not depend on each other. Issue both tool calls together in a single turn instead of one per turn.
+
+1. **Review AWS Product Guidelines**: Read the official Amazon Web Services product listing guidelines provided in the "AWS Product Guidelines" section. These guidelines are PRIMARY and must be used to generate the recommendations.
 
 2. **Retrieve Competitor Analysis**: Use the `get_competitor_report` tool to get the competitive analysis report. This is SECONDARY and provides supporting context.
 
@@ -88,3 +92,5 @@ Generate a structured report with:
 - Quote specific AWS guidelines wherever possible
 - Quote specific competitor analysis wherever possible
 """
+
+guidelines_heading = "\n## AWS Product Guidelines\n\n"
@@ -1,81 +1,116 @@
 import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional
 
-from django.conf import settings
 from google.adk.agents import Agent
-from google.adk.models.lite_llm import LiteLlm
 
-from ally.ai.agents.consts import DEFAULT_MODEL
-from ally.ai.agents.recommendations.prompt import instructions
+from ally.ai.agents.llm import get_llm
+from ally.ai.agents.recommendations.prompt import guidelines_heading, instructions
 from ally.ai.agents.recommendations.tools import (
-    get_aws_guidelines,
+    aws_guidelines_tool,
     get_competitor_report,
-    get_product_details
+    get_product_details,
+    load_aws_guidelines
 )
 from ally.ai.agents.recommendations.callbacks import save_llm_request_callback
 
 logger = logging.getLogger(__name__)
 
+_CONTEXT_HEADING = """---
 
-def recommendations_agent(product_id: str, competitor_report: str = None):
-    """
-    Create and return a recommendations agent configured for a specific product.
-
-    Args:
-        product_id: The product ID to generate recommendations for
-        competitor_report: Optional competitor analysis report
-
-    Returns:
-        Configured Agent instance
-    """
-    logger.info(f'Creating recommendations agent for product: {product_id}')
-
-    # Inject product_id and competitor report context into instructions
-    contextualized_instructions = f"""
 ## Context for This Analysis:
 
-You are generating optimization recommendations for product ID: **{product_id}**
-
 """
 
-    if competitor_report:
-        contextualized_instructions += f"""
+_WITH_COMPETITOR_CONTEXT = """You are generating optimization recommendations for product ID: **{product_id}**
+
+
 **Competitor Analysis Available:**
 A competitor analysis report is available and should be used as SECONDARY justification.
 
-Use the function tools available to you in this order:
-1. Call `get_aws_guidelines` to retrieve AWS product listing guidelines (PRIMARY source - MANDATORY)
-2. Call `get_product_details` with product_id: {product_id} to get current product information
-3. Call `get_competitor_report` with product_id: {product_id} to get the competitor analysis (SECONDARY source)
-4. Generate exactly 3 specific, actionable recommendations
+Use the function tools available to you. Steps 1-2 are independent of each other, so request both tool calls together in a single turn:
+1. Call `get_product_details` with product_id: {product_id} to get current product information
+2. Call `get_competitor_report` with product_id: {product_id} to get the competitor analysis (SECONDARY source)
+3. Generate exactly 3 specific, actionable recommendations, using the AWS guidelines above as the PRIMARY source
 
 """
-    else:
-        contextualized_instructions += f"""
+
+_WITHOUT_COMPETITOR_CONTEXT = """You are generating optimization recommendations for product ID: **{product_id}**
+
+
 **Note:** No competitor analysis is available yet. Focus recommendations primarily on AWS guidelines compliance.
 
 Use the function tools available to you:
-1. Call `get_aws_guidelines` to retrieve AWS product listing guidelines (PRIMARY source - MANDATORY)
-2. Call `get_product_details` with product_id: {product_id} to get current product information
-3. Generate exactly 3 specific, actionable recommendations based on AWS guidelines
+1. Call `get_product_details` with product_id: {product_id} to get current product information
+2. Generate exactly 3 specific, actionable recommendations based on the AWS guidelines above
 
 """
 
-    contextualized_instructions += f"""
----
 
-{instructions}
-"""
+@lru_cache(maxsize=1)
+def _instructions_prefix(guidelines_text: str) -> str:
+    """
+    Build the static part of the instruction for a given guidelines text.
+
+    The static instructions and the full AWS guidelines come first and the
+    per-product context last, so every request shares the same prompt prefix and
+    can hit the provider's prompt cache. The guidelines are sent once this way
+    instead of being returned as a tool result and re-read on every turn.
+
+    Args:
+        guidelines_text: Extracted guidelines, or an empty string if unavailable
+
+    Returns:
+        The instruction prefix
+    """
+    if not guidelines_text:
+        return f"{instructions}\n{_CONTEXT_HEADING}"
+    return f"{instructions}{guidelines_heading}{guidelines_text}\n{_CONTEXT_HEADING}"
+
+
+def recommendations_agent(
+    product_id: str,
+    competitor_report: str = None,
+    guidelines: Optional[Dict[str, Any]] = None
+):
+    """
+    Create and return a recommendations agent configured for a specific product.
+
+    Args:
+        product_id: The product ID to generate recommendations for
+        competitor_report: Optional competitor analysis report
+        guidelines: Result of load_aws_guidelines(). Async callers should load it in a
+            thread and pass it in, since parsing the PDF on a cold cache blocks;
+            it is loaded here if omitted.
+
+    Returns:
+        Configured Agent instance
+    """
+    logger.info(f'Creating recommendations agent for product: {product_id}')
+
+    # Only the product ID is interpolated; the static prefix is shared by every request
+    if guidelines is None:
+        guidelines = load_aws_guidelines()
+    if guidelines['status'] != 'success':
+        logger.warning('AWS Guidelines unavailable, creating recommendations agent without them')
+    guidelines_text = guidelines.get('guidelines_text', '')
+    instructions_prefix = _instructions_prefix(guidelines_text)
+
+    context_template = _WITH_COMPETITOR_CONTEXT if competitor_report else _WITHOUT_COMPETITOR_CONTEXT
+    contextualized_instructions = instructions_prefix + context_template.format(product_id=product_id)
+
+    # A plain-string instruction goes through ADK's {state_key} templating, which would
+    # fail on any braces in the guidelines text; a provider's result is used verbatim
+    def instruction_provider(context) -> str:
+        return contextualized_instructions
 
     # Create the agent with callable function tools
     agent = Agent(
-        model=LiteLlm(
-            model=DEFAULT_MODEL,
-            api_key=settings.GOOGLE_API_KEY
-        ),
+        model=get_llm(),
         name="recommendations_agent",
-        instruction=contextualized_instructions,
+        instruction=instruction_provider,
         description="An expert e-commerce product optimization consultant that generates actionable recommendations based on AWS guidelines and competitive analysis.",
-        tools=[get_aws_guidelines, get_product_details, get_competitor_report],
+        tools=[aws_guidelines_tool(bool(guidelines_text)), get_product_details, get_competitor_report],
         before_model_callback=save_llm_request_callback,
     )
 
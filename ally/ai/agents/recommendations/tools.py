@@ -1,24 +1,34 @@
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from pathlib import Path
 
 from django.conf import settings
 from ally.product_service import product_service
-from ally.services import competitor_report_service
 from ally.services.pdf_extractor import PDFExtractor
 from ally.services.competitor_report_service import competitor_report_service
 
 logger = logging.getLogger(__name__)
 
+# Extracted guidelines keyed by (path, mtime). The returned dict is shared between
+# calls, so callers must treat it as read-only.
+_GUIDELINES_CACHE: Dict[Tuple[str, int], Dict[str, Any]] = {}
 
-def get_aws_guidelines() -> Dict[str, Any]:
+GUIDELINES_DOC_ID = 'aws-guidelines'
+
+
+def load_aws_guidelines() -> Dict[str, Any]:
     """
-    Extract and return the AWS Product Guidelines from the PDF file.
+    Extract the AWS Product Guidelines from the PDF file.
+
+    The extraction is cached until the file changes. This is blocking work; the
+    recommendations agent calls it once to place the guidelines in its instruction.
 
     Returns:
         Dictionary containing:
         - guidelines_text: Full text content of AWS guidelines
         - source: Path to the guidelines file
+        - length: Length of the guidelines text
         - status: Success or error status
     """
     logger.info('Extracting AWS Product Guidelines from PDF')
@@ -34,18 +44,30 @@ def get_aws_guidelines() -> Dict[str, Any]:
                 'status': 'error'
             }
 
+        # The PDF is static, so reuse the extraction until the file changes
+        cache_key = (str(guidelines_path), guidelines_path.stat().st_mtime_ns)
+        cached = _GUIDELINES_CACHE.get(cache_key)
+        if cached is not None:
+            logger.info('Using cached AWS Guidelines')
+            return cached
+
         # Extract content with markdown tables
         guidelines_content = PDFExtractor.extract_with_markdown_tables(str(guidelines_path))
 
         logger.info(f'Successfully extracted AWS Guidelines ({len(guidelines_content)} characters)')
 
-        return {
+        result = {
             'guidelines_text': guidelines_content,
             'source': str(guidelines_path),
             'length': len(guidelines_content),
             'status': 'success'
         }
 
+        # Only the latest version of the file is worth keeping
+        _GUIDELINES_CACHE.clear()
+        _GUIDELINES_CACHE[cache_key] = result
+        return result
+
     except Exception as e:
         logger.error(f'Error extracting AWS Guidelines: {str(e)}', exc_info=True)
         return {
@@ -54,7 +76,60 @@ def get_aws_guidelines() -> Dict[str, Any]:
         }
 
 
-def get_competitor_report(product_id: str) -> Dict[str, Any]:
+def aws_guidelines_tool(guidelines_in_instruction: bool):
+    """
+    Build the get_aws_guidelines tool for a recommendations agent.
+
+    Args:
+        guidelines_in_instruction: Whether the agent's instruction already contains
+            the guidelines text
+
+    Returns:
+        The get_aws_guidelines tool function
+    """
+    async def get_aws_guidelines() -> Dict[str, Any]:
+        """
+        Get the AWS Product Guidelines.
+
+        When the guidelines text is already part of the agent's instruction, it is
+        sent once as a cacheable prompt prefix instead of being repeated as a tool
+        result, and only a confirmation is returned.
+
+        Returns:
+            Dictionary containing:
+            - doc_id: Identifier of the guidelines document
+            - guidelines_text: Full text of the guidelines, only if it is not already in the instruction
+            - source: Path to the guidelines file
+            - length: Length of the guidelines text
+            - status: loaded_in_system_prompt, success or error
+        """
+        # Parsing the PDF on a cold cache is blocking work, so it runs in a thread to
+        # keep the event loop free for concurrent tool calls
+        guidelines = await asyncio.to_thread(load_aws_guidelines)
+        if guidelines['status'] != 'success':
+            return guidelines
+
+        if not guidelines_in_instruction:
+            # The agent was built while the guidelines were unavailable
+            return {
+                'doc_id': GUIDELINES_DOC_ID,
+                'guidelines_text': guidelines['guidelines_text'],
+                'source': guidelines['source'],
+                'length': guidelines['length'],
+                'status': 'success'
+            }
+
+        return {
+            'doc_id': GUIDELINES_DOC_ID,
+            'source': guidelines['source'],
+            'length': guidelines['length'],
+            'status': 'loaded_in_system_prompt'
+        }
+
+    return get_aws_guidelines
+
+
+async def get_competitor_report(product_id: str) -> Dict[str, Any]:
     """
     Retrieve the competitor analysis report for a product.
 
@@ -69,8 +144,8 @@ def get_competitor_report(product_id: str) -> Dict[str, Any]:
     """
     logger.info(f'Retrieving competitor report for product: {product_id}')
 
-
-    competitor_report_text = competitor_report_service.get_report(product_id)
+    # The report may have to be read from disk, so don't block the event loop on it
+    competitor_report_text = await asyncio.to_thread(competitor_report_service.get_report, product_id)
     if competitor_report_text:
         return {
             'report': competitor_report_text,
@@ -87,7 +162,7 @@ def get_competitor_report(product_id: str) -> Dict[str, Any]:
     }
 
 
-def get_product_details(product_id: str) -> Dict[str, Any]:
+async def get_product_details(product_id: str) -> Dict[str, Any]:
     """
     Get detailed information about a product.
 
@@ -109,26 +184,34 @@ def get_product_details(product_id: str) -> Dict[str, Any]:
             'status': 'error'
         }
 
-    # Convert product to dictionary for the agent
-    product_dict = product.model_dump()
-
-    # Add computed fields for analysis
-    product_dict['title_length'] = len(product.title) if product.title else 0
-    product_dict['num_bullet_points'] = len(product.bullet_points) if product.bullet_points else 0
-
-    if product.bullet_points:
-        bullet_lengths = [len(bp) for bp in product.bullet_points]
-        product_dict['avg_bullet_length'] = sum(bullet_lengths) / len(bullet_lengths)
-        product_dict['total_bullet_chars'] = sum(bullet_lengths)
-        product_dict['bullet_point_lengths'] = bullet_lengths
-    else:
-        product_dict['avg_bullet_length'] = 0
-        product_dict['total_bullet_chars'] = 0
-        product_dict['bullet_point_lengths'] = []
-
-    product_dict['description_length'] = len(product.description_filled) if product.description_filled else 0
-    product_dict['has_image'] = bool(product.image_url and len(product.image_url) > 0)
-    product_dict['num_images'] = len(product.image_url) if product.image_url else 0
+    title = product.title
+    bullet_points = product.bullet_points or ()
+    description = product.description_filled
+    image_url = product.image_url
+    num_images = len(image_url) if image_url else 0
+
+    # Only the listing fields the recommendations are based on are passed to the agent
+    product_dict = {
+        'product_id': product.product_id,
+        'title': title,
+        'bullet_points': product.bullet_points,
+        'description_filled': description,
+        'image_url': image_url,
+        'retailer_category_node': product.retailer_category_node,
+        'retailer_brand_name': product.retailer_brand_name,
+    }
+
+    # Add computed fields for analysis, summing the bullet lengths in a single pass
+    num_bullet_points = len(bullet_points)
+    total_bullet_chars = sum(map(len, bullet_points))
+
+    product_dict['title_length'] = len(title) if title else 0
+    product_dict['num_bullet_points'] = num_bullet_points
+    product_dict['avg_bullet_length'] = total_bullet_chars / num_bullet_points if num_bullet_points else 0
+    product_dict['total_bullet_chars'] = total_bullet_chars
+    product_dict['description_length'] = len(description) if description else 0
+    product_dict['has_image'] = num_images > 0
+    product_dict['num_images'] = num_images
 
     logger.info(f'Successfully retrieved product details: {product_id}')
     return product_dict
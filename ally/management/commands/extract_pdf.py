@@ -39,47 +39,21 @@ class Command(BaseCommand):
         try:
             if format_type == 'text':
                 # Extract text only
-                content = PDFExtractor.extract_text_only(pdf_path)
-                output = content
+                chunks = (PDFExtractor.extract_text_only(pdf_path),)
 
             elif format_type == 'markdown':
                 # Extract text and tables with markdown formatting
-                content = PDFExtractor.extract_with_markdown_tables(pdf_path)
-                output = content
+                chunks = (PDFExtractor.extract_with_markdown_tables(pdf_path),)
 
             else:  # full
-                # Extract everything including metadata
-                import json
-                result = PDFExtractor.extract_from_file(pdf_path)
-
-                # Format for display
-                output = f"PDF Extraction Results\n"
-                output += f"{'='*80}\n\n"
-                output += f"Metadata:\n"
-                for key, value in result['metadata'].items():
-                    if value:
-                        output += f"  {key}: {value}\n"
-                output += f"\nNumber of Pages: {result['num_pages']}\n"
-                output += f"\n{'='*80}\n\n"
-
-                # Add page content
-                for page in result['pages']:
-                    output += f"\nPage {page['page_number']}\n"
-                    output += f"{'-'*80}\n"
-                    output += page['text']
-                    output += "\n"
-
-                    if page['tables']:
-                        output += f"\nTables found: {len(page['tables'])}\n"
-                        for table in page['tables']:
-                            output += f"\nTable {table['table_index'] + 1}:\n"
-                            output += table['markdown']
-                            output += "\n"
+                # Extract everything including metadata, one page at a time
+                info = PDFExtractor.get_document_info(pdf_path)
+                chunks = self._format_full(info, PDFExtractor.iter_pages(pdf_path))
 
             # Output results
             if output_file:
                 with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(output)
+                    f.writelines(chunks)
                 self.stdout.write(
                     self.style.SUCCESS(f'Content saved to {output_file}')
                 )
@@ -88,7 +62,7 @@ class Command(BaseCommand):
                 self.stdout.write('\n' + '='*80)
                 self.stdout.write('EXTRACTED CONTENT')
                 self.stdout.write('='*80 + '\n')
-                self.stdout.write(output)
+                self.stdout.write(''.join(chunks))
                 self.stdout.write('\n' + '='*80 + '\n')
 
             self.stdout.write(self.style.SUCCESS('Extraction completed successfully'))
@@ -103,3 +77,41 @@ class Command(BaseCommand):
                 self.style.ERROR(f'Error extracting PDF: {str(e)}')
             )
             raise
+
+    @staticmethod
+    def _format_full(info, pages):
+        """
+        Yield the display text for a full extraction.
+
+        The chunks are written to the output one at a time (or joined once),
+        so with --output each page is written before the next one is parsed.
+
+        Args:
+            info: Dictionary returned by PDFExtractor.get_document_info
+            pages: Page contents, as yielded by PDFExtractor.iter_pages
+
+        Yields:
+            Consecutive fragments of the formatted output
+        """
+        yield "PDF Extraction Results\n"
+        yield f"{'='*80}\n\n"
+        yield "Metadata:\n"
+        for key, value in info['metadata'].items():
+            if value:
+                yield f"  {key}: {value}\n"
+        yield f"\nNumber of Pages: {info['num_pages']}\n"
+        yield f"\n{'='*80}\n\n"
+
+        # Add page content
+        for page in pages:
+            yield f"\nPage {page['page_number']}\n"
+            yield f"{'-'*80}\n"
+            yield page['text']
+            yield "\n"
+
+            if page['tables']:
+                yield f"\nTables found: {len(page['tables'])}\n"
+                for table in page['tables']:
+                    yield f"\nTable {table['table_index'] + 1}:\n"
+                    yield table['markdown']
+                    yield "\n"
@@ -3,7 +3,7 @@ import asyncio
 import os
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 from ally.product_service import product_service
 from ally.services.agent_service import AgentService
@@ -18,13 +18,14 @@ class Command(BaseCommand):
         parser.add_argument(
             'product_id',
             type=str,
-            help='The product ID (ASIN) to finalize'
+            nargs='+',
+            help='One or more product IDs (ASINs) to finalize'
         )
         parser.add_argument(
             '--output',
             type=str,
             default=None,
-            help='Optional output file path to save the summary (default: print to stdout)'
+            help='Optional output file path to save the summary, single product only (default: print to stdout)'
         )
         parser.add_argument(
             '--user-id',
@@ -38,27 +39,45 @@ class Command(BaseCommand):
             default=600,
             help='Timeout in seconds (default: 600 / 10 minutes)'
         )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Maximum number of products finalized at the same time (default: 4)'
+        )
 
     def handle(self, *args, **options):
-        product_id = options['product_id']
+        product_ids = list(dict.fromkeys(options['product_id']))
         output_file = options['output']
         user_id = options['user_id']
         timeout = options['timeout']
+        concurrency = max(1, options['concurrency'])
+
+        if output_file and len(product_ids) > 1:
+            raise CommandError('--output can only be used when finalizing a single product')
 
-        logger.info(f'Finalizing product: {product_id}')
+        logger.info(f'Finalizing products: {", ".join(product_ids)}')
         self.stdout.write(self.style.SUCCESS(
-            f'Finalizing product updates for: {product_id}'
+            f'Finalizing product updates for: {", ".join(product_ids)}'
         ))
 
-        # Verify the product exists
-        product = product_service.get_product_by_id(product_id)
-        if not product:
-            self.stderr.write(
-                self.style.ERROR(f'Product {product_id} not found in product service')
-            )
-            return
+        # Verify the products exist; missing ones count as failures
+        found_ids = []
+        failed = []
+        for product_id in product_ids:
+            product = product_service.get_product_by_id(product_id)
+            if not product:
+                self.stderr.write(
+                    self.style.ERROR(f'Product {product_id} not found in product service')
+                )
+                failed.append(product_id)
+                continue
+            self.stdout.write(f'Found product: {product.title}')
+            found_ids.append(product_id)
+
+        if not found_ids:
+            raise CommandError(f'None of the products were found: {", ".join(failed)}')
 
-        self.stdout.write(f'Found product: {product.title}')
         self.stdout.write('Running final agent workflow...')
         self.stdout.write('This will:')
         self.stdout.write('  1. Apply recommendation #1')
@@ -66,40 +85,82 @@ class Command(BaseCommand):
         self.stdout.write('  3. Apply recommendation #3')
         self.stdout.write('  4. Create comprehensive summary')
 
-        # Run the final agent using AgentService
-        try:
-            summary = asyncio.run(
-                AgentService.run_final_agent(
-                    product_id=product_id,
-                    user_id=user_id,
-                    timeout_seconds=timeout
-                )
+        # Run the final agents using AgentService, all in one event loop
+        failed += asyncio.run(
+            self._finalize_products(found_ids, user_id, timeout, concurrency, output_file)
+        )
+
+        if failed:
+            raise CommandError(
+                f'Failed to finalize {len(failed)} of {len(product_ids)} products: {", ".join(failed)}'
             )
 
-            # Output the summary
-            if not output_file:
-                output_file = os.path.join(settings.BASE_DIR, 'summarization', f'summarization_{product_id}.md')
-                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        logger.info('Product finalization completed successfully')
+        self.stdout.write(self.style.SUCCESS('Product finalization completed successfully'))
+
+    async def _finalize_products(self, product_ids, user_id, timeout, concurrency, output_file):
+        """
+        Run the final agent for each product, at most `concurrency` at a time.
+
+        Summaries are saved and printed as soon as each run completes.
+
+        Returns:
+            The product IDs whose finalization failed
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def finalize(product_id):
+            async with semaphore:
+                try:
+                    summary = await AgentService.run_final_agent(
+                        product_id=product_id,
+                        user_id=user_id,
+                        timeout_seconds=timeout
+                    )
+                except Exception as e:
+                    return product_id, None, e
+            return product_id, summary, None
+
+        failed = []
+        tasks = [asyncio.create_task(finalize(product_id)) for product_id in product_ids]
+        for next_done in asyncio.as_completed(tasks):
+            product_id, summary, error = await next_done
+
+            if error is None:
+                # A failed write must not escape the loop, or asyncio.run would cancel
+                # the runs still updating other products
+                try:
+                    self._write_summary(product_id, summary, output_file)
+                except Exception as e:
+                    error = e
+
+            if error is not None:
+                logger.error(f'Error finalizing product {product_id}: {str(error)}', exc_info=error)
+                self.stderr.write(
+                    self.style.ERROR(f'Error finalizing product {product_id}: {str(error)}')
+                )
+                failed.append(product_id)
 
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(summary)
-            self.stdout.write(
-                self.style.SUCCESS(f'Summary saved to {output_file}')
-            )
-            logger.info(f'Summary saved to {output_file}')
+        return failed
 
-            self.stdout.write('\n' + '='*80)
-            self.stdout.write('FINALIZATION SUMMARY')
-            self.stdout.write('='*80 + '\n')
-            self.stdout.write(summary)
-            self.stdout.write('\n' + '='*80 + '\n')
+    def _write_summary(self, product_id, summary, output_file):
+        """Save the summary of one product and print it."""
+        if summary is None:
+            raise ValueError('The final agent returned no summary')
 
-            logger.info('Product finalization completed successfully')
-            self.stdout.write(self.style.SUCCESS('Product finalization completed successfully'))
+        if not output_file:
+            output_file = os.path.join(settings.BASE_DIR, 'summarization', f'summarization_{product_id}.md')
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-        except Exception as e:
-            logger.error(f'Error finalizing product: {str(e)}', exc_info=True)
-            self.stderr.write(
-                self.style.ERROR(f'Error finalizing product: {str(e)}')
-            )
-            raise
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(summary)
+        self.stdout.write(
+            self.style.SUCCESS(f'Summary saved to {output_file}')
+        )
+        logger.info(f'Summary saved to {output_file}')
+
+        self.stdout.write('\n' + '='*80)
+        self.stdout.write(f'FINALIZATION SUMMARY: {product_id}')
+        self.stdout.write('='*80 + '\n')
+        self.stdout.write(summary)
+        self.stdout.write('\n' + '='*80 + '\n')
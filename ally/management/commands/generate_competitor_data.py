@@ -1,15 +1,18 @@
 import os
+import re
 import json
-import time
+import operator
+import hashlib
+import asyncio
 import csv
 import logging
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from litellm import completion
-from tqdm import tqdm
+from litellm import acompletion
+from tqdm.asyncio import tqdm_asyncio
 
 from ally.product_service import product_service, Product
 from ally.ai.agents.consts import MODEL_GEMINI_2_5_FLASH_LITE
@@ -17,6 +20,43 @@ from ally.ai.agents.consts import MODEL_GEMINI_2_5_FLASH_LITE
 
 logger = logging.getLogger(__name__)
 
+# Markdown code fence around the JSON in a model response, e.g. ```json ... ```
+JSON_FENCE_PATTERN = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+
+# Columns of the generated competitors CSV, matching the Product model
+COMPETITOR_CSV_FIELDS = [
+    'product_id',
+    'title',
+    'universe',
+    'image_url',
+    'bullet_points',
+    'min_rank_search',
+    'avg_rank_search',
+    'min_rank_category',
+    'avg_rank_category',
+    'retailer_category_node',
+    'retailer_brand_name',
+    'description_filled',
+    'source_product_id'
+]
+
+# Reads a competitor's values in COMPETITOR_CSV_FIELDS order
+_competitor_values = operator.attrgetter(*COMPETITOR_CSV_FIELDS)
+
+# Fields every generated competitor must have, shared by the single and batch prompts
+COMPETITOR_FIELDS = """   - product_id: Generate a unique ASIN-like ID (format: B0XXXXXXXXX)
+   - title: A realistic product title (different brand/variant)
+   - universe: Same category as the original (or leave null if original is null)
+   - image_url: An empty list [] (we won't generate actual image URLs)
+   - bullet_points: A list of 3-7 realistic bullet points describing features
+   - min_rank_search: A number between 1-100 (can be null)
+   - avg_rank_search: A number between 1-100 (can be null)
+   - min_rank_category: A number between 1-50 (can be null)
+   - avg_rank_category: A number between 1-50 (can be null)
+   - retailer_category_node: Same or similar category as original
+   - retailer_brand_name: A different, realistic brand name
+   - description_filled: A 1-2 sentence product description"""
+
 
 class Command(BaseCommand):
     help = 'Generate synthetic competitor product data using Gemini API'
@@ -26,7 +66,19 @@ class Command(BaseCommand):
             '--delay',
             type=float,
             default=2.0,
-            help='Delay in seconds between API requests (default: 2.0)'
+            help='Delay in seconds between API requests of each concurrent worker (default: 2.0)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Maximum number of API requests in flight at the same time (default: 8)'
+        )
+        parser.add_argument(
+            '--retries',
+            type=int,
+            default=3,
+            help='Retries for a failed API request; rate limit errors back off exponentially (default: 3)'
         )
         parser.add_argument(
             '--competitors-per-product',
@@ -34,17 +86,33 @@ class Command(BaseCommand):
             default=2,
             help='Number of competitor products to generate per original product (default: 2)'
         )
+        parser.add_argument(
+            '--products-per-request',
+            type=int,
+            default=1,
+            help='Number of original products sent in each API request (default: 1)'
+        )
         parser.add_argument(
             '--limit',
             type=int,
             default=None,
             help='Limit the number of products to process (useful for testing)'
         )
+        parser.add_argument(
+            '--cache',
+            action='store_true',
+            help='Cache API responses on disk and reuse them on later runs; uses temperature 0 so cached answers stay representative'
+        )
 
     def handle(self, *args, **options):
         delay = options['delay']
         competitors_per_product = options['competitors_per_product']
         limit = options['limit']
+        concurrency = max(1, options['concurrency'])
+        products_per_request = max(1, options['products_per_request'])
+        self.delay = delay
+        self.num_retries = max(0, options['retries'])
+        self.cache_dir = self.get_cache_dir() if options['cache'] else None
 
         logger.info(f'Starting competitor data generation with {competitors_per_product} competitors per product')
         self.stdout.write(self.style.SUCCESS(
@@ -63,66 +131,144 @@ class Command(BaseCommand):
 
         self.stdout.write(f'Loaded {len(products)} products from CSV')
 
-        # Generate competitors for each product
-        all_competitors = []
+        # Rows are written as soon as each request completes, so a crash keeps the work
+        # done so far in the partial file. It replaces the output once the run succeeds.
+        output_path = self.get_output_path()
+        partial_path = output_path.with_name(output_path.name + '.partial')
+        logger.info(f'Saving competitors to {partial_path} while generating')
 
-        for product in tqdm(products, desc="Generating competitors"):
-            try:
-                logger.info(f'Generating competitors for product {product.product_id}: {product.title}')
-                competitors = self.generate_competitors(product, competitors_per_product)
-                all_competitors.extend(competitors)
-                logger.info(f'Successfully generated {len(competitors)} competitors for {product.product_id}')
+        with open(partial_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(COMPETITOR_CSV_FIELDS)
 
-                # Space out requests to respect API throttling
-                time.sleep(delay)
+            def write_competitors(competitors: List[Product]) -> None:
+                writer.writerows(self.competitor_row(competitor) for competitor in competitors)
+                csvfile.flush()
 
-            except Exception as e:
-                logger.error(f'Error generating competitors for {product.product_id}: {str(e)}', exc_info=True)
-                self.stderr.write(
-                    self.style.ERROR(f'Error generating competitors for {product.product_id}: {str(e)}')
+            # Generate competitors for all products, with at most `concurrency` requests in flight
+            saved_count = asyncio.run(
+                self.generate_all_competitors(
+                    products, competitors_per_product, concurrency, products_per_request, write_competitors
                 )
-                continue
+            )
 
-        # Save to CSV
-        output_path = self.get_output_path()
-        logger.info(f'Saving {len(all_competitors)} competitors to {output_path}')
-        self.save_to_csv(all_competitors, output_path)
+        if not saved_count:
+            partial_path.unlink()
+            self.stderr.write(self.style.WARNING('No competitors to save'))
+            return
 
-        logger.info(f'Successfully completed competitor generation: {len(all_competitors)} competitors saved')
+        os.replace(partial_path, output_path)
+        self.stdout.write(f'Saved {saved_count} competitors to {output_path}')
+
+        logger.info(f'Successfully completed competitor generation: {saved_count} competitors saved')
         self.stdout.write(
             self.style.SUCCESS(
-                f'Successfully generated {len(all_competitors)} competitor products and saved to {output_path}'
+                f'Successfully generated {saved_count} competitor products and saved to {output_path}'
             )
         )
 
-    def generate_competitors(self, product: Product, num_competitors: int) -> List[Product]:
+    async def generate_all_competitors(
+        self,
+        products: List[Product],
+        num_competitors: int,
+        concurrency: int,
+        products_per_request: int,
+        on_generated: Callable[[List[Product]], None]
+    ) -> int:
+        """
+        Generate competitors for every product concurrently.
+
+        Products are sent `products_per_request` at a time. Requests are bounded by
+        a semaphore, and each worker waits `--delay` seconds after an API request
+        before releasing its slot to respect API throttling. Requests that fail are
+        reported and their products skipped.
+
+        Args:
+            on_generated: Called with the competitors of each request as it completes
+
+        Returns:
+            The number of competitors generated
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate(batch: List[Product]) -> int:
+            product_ids = ', '.join(product.product_id for product in batch)
+            async with semaphore:
+                try:
+                    if len(batch) == 1:
+                        product = batch[0]
+                        logger.info(f'Generating competitors for product {product.product_id}: {product.title}')
+                        competitors = await self.generate_competitors(product, num_competitors)
+                    else:
+                        logger.info(f'Generating competitors for products {product_ids}')
+                        competitors = await self.generate_competitors_batch(batch, num_competitors)
+                    logger.info(f'Successfully generated {len(competitors)} competitors for {product_ids}')
+                    on_generated(competitors)
+                    return len(competitors)
+
+                except Exception as e:
+                    logger.error(f'Error generating competitors for {product_ids}: {str(e)}', exc_info=True)
+                    self.stderr.write(
+                        self.style.ERROR(f'Error generating competitors for {product_ids}: {str(e)}')
+                    )
+                    return 0
+
+        batches = [
+            products[start:start + products_per_request]
+            for start in range(0, len(products), products_per_request)
+        ]
+
+        # The progress bar advances as each request completes, in whatever order
+        results = await tqdm_asyncio.gather(
+            *(generate(batch) for batch in batches),
+            desc="Generating competitors",
+            unit="request"
+        )
+
+        return sum(results)
+
+    async def generate_competitors(self, product: Product, num_competitors: int) -> List[Product]:
         """Generate synthetic competitor products using Gemini API."""
 
         # Create a prompt for the LLM
         prompt = self.create_prompt(product, num_competitors)
 
-        # Call Gemini through LiteLLM
-        logger.debug(f'Calling Gemini API with model {MODEL_GEMINI_2_5_FLASH_LITE}')
-        response = completion(
-            model=MODEL_GEMINI_2_5_FLASH_LITE,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            api_key=settings.GOOGLE_API_KEY,
-            temperature=0.8,
-        )
-        logger.debug('Received response from Gemini API')
-
-        # Parse the response
-        response_text = response.choices[0].message.content
+        # Call Gemini and parse the response
+        response_text = await self.request_completion(prompt)
         logger.debug(f'Response text length: {len(response_text)} characters')
         competitors_data = self.parse_response(response_text, num_competitors)
         logger.debug(f'Parsed {len(competitors_data)} competitor data entries')
+        if competitors_data:
+            self.cache_response(prompt, response_text)
+
+        return self.build_competitors(product, competitors_data)
+
+    async def generate_competitors_batch(self, products: List[Product], num_competitors: int) -> List[Product]:
+        """Generate synthetic competitors for several products with a single API request."""
+
+        prompt = self.create_batch_prompt(products, num_competitors)
+
+        # Call Gemini and parse the response
+        response_text = await self.request_completion(prompt)
+        logger.debug(f'Response text length: {len(response_text)} characters')
+        competitors_by_source = self.parse_batch_response(response_text)
+        if competitors_by_source:
+            self.cache_response(prompt, response_text)
+
+        competitors = []
+        for product in products:
+            competitors_data = competitors_by_source.get(product.product_id)
+            if not isinstance(competitors_data, list):
+                self.stderr.write(
+                    self.style.WARNING(f'No competitors returned for product {product.product_id}')
+                )
+                continue
+            competitors.extend(self.build_competitors(product, competitors_data))
+
+        return competitors
 
-        # Create Product objects
+    def build_competitors(self, product: Product, competitors_data: List[Dict[str, Any]]) -> List[Product]:
+        """Create competitor Product objects linked to their original product."""
         competitors = []
         for comp_data in competitors_data:
             try:
@@ -138,23 +284,76 @@ class Command(BaseCommand):
 
         return competitors
 
+    def get_cache_file(self, prompt: str) -> Optional[Path]:
+        """Return the cache file of a prompt's response, keyed by model and prompt, or None without --cache."""
+        if self.cache_dir is None:
+            return None
+        cache_key = hashlib.sha256(f'{MODEL_GEMINI_2_5_FLASH_LITE}\n{prompt}'.encode('utf-8')).hexdigest()
+        return self.cache_dir / f'{cache_key}.txt'
+
+    def cache_response(self, prompt: str, response_text: str) -> None:
+        """
+        Store a response that parsed successfully, with --cache.
+
+        Only parsed responses are stored, so a malformed answer is requested again on
+        the next run instead of being replayed. The file is written under a temporary
+        name and renamed into place, so concurrent runs never read a partial response.
+        """
+        cache_file = self.get_cache_file(prompt)
+        if cache_file is None or cache_file.exists():
+            return
+
+        tmp_file = cache_file.with_name(f'{cache_file.name}.{os.getpid()}.tmp')
+        try:
+            tmp_file.write_text(response_text, encoding='utf-8')
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f'Failed to cache response {cache_file.name}: {str(e)}')
+            tmp_file.unlink(missing_ok=True)
+
+    async def request_completion(self, prompt: str) -> str:
+        """
+        Send a prompt to Gemini and return the response text.
+
+        With --cache, a response stored by cache_response is returned without calling
+        the API or waiting for the delay.
+        """
+        cache_file = self.get_cache_file(prompt)
+        if cache_file is not None:
+            try:
+                response_text = cache_file.read_text(encoding='utf-8')
+                logger.debug(f'Using cached response {cache_file.name}')
+                return response_text
+            except FileNotFoundError:
+                pass
+
+        # Call Gemini through LiteLLM
+        logger.debug(f'Calling Gemini API with model {MODEL_GEMINI_2_5_FLASH_LITE}')
+        response = await acompletion(
+            model=MODEL_GEMINI_2_5_FLASH_LITE,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            api_key=settings.GOOGLE_API_KEY,
+            temperature=0.0 if cache_file is not None else 0.8,
+            # Let LiteLLM retry transient failures instead of dropping the products
+            num_retries=self.num_retries,
+        )
+        logger.debug('Received response from Gemini API')
+        response_text = response.choices[0].message.content
+
+        # Space out requests to respect API throttling
+        await asyncio.sleep(self.delay)
+        return response_text
+
     def create_prompt(self, product: Product, num_competitors: int) -> str:
         """Create a prompt for generating competitor products."""
 
         # Convert product to dict for display
-        product_info = {
-            "product_id": product.product_id,
-            "title": product.title,
-            "universe": product.universe,
-            "bullet_points": product.bullet_points,
-            "min_rank_search": product.min_rank_search,
-            "avg_rank_search": product.avg_rank_search,
-            "min_rank_category": product.min_rank_category,
-            "avg_rank_category": product.avg_rank_category,
-            "retailer_category_node": product.retailer_category_node,
-            "retailer_brand_name": product.retailer_brand_name,
-            "description_filled": product.description_filled
-        }
+        product_info = self.product_info(product)
 
         prompt = f"""Generate {num_competitors} synthetic competitor products based on the following original product. The competitors should be realistic alternatives in the same category with similar features but different brands, titles, and specifications.
 
@@ -164,18 +363,7 @@ Original Product:
 Requirements:
 1. Generate {num_competitors} competitor products as a JSON array
 2. Each competitor must have ALL of the following fields:
-   - product_id: Generate a unique ASIN-like ID (format: B0XXXXXXXXX)
-   - title: A realistic product title (different brand/variant)
-   - universe: Same category as the original (or leave null if original is null)
-   - image_url: An empty list [] (we won't generate actual image URLs)
-   - bullet_points: A list of 3-7 realistic bullet points describing features
-   - min_rank_search: A number between 1-100 (can be null)
-   - avg_rank_search: A number between 1-100 (can be null)
-   - min_rank_category: A number between 1-50 (can be null)
-   - avg_rank_category: A number between 1-50 (can be null)
-   - retailer_category_node: Same or similar category as original
-   - retailer_brand_name: A different, realistic brand name
-   - description_filled: A 1-2 sentence product description
+{COMPETITOR_FIELDS}
 
 3. Make the competitors realistic competitors - similar product type but differentiated
 4. Vary the rankings slightly to make them competitive
@@ -194,25 +382,92 @@ Return format:
 """
         return prompt
 
+    def create_batch_prompt(self, products: List[Product], num_competitors: int) -> str:
+        """Create a single prompt generating competitors for several products."""
+
+        products_info = [self.product_info(product) for product in products]
+
+        prompt = f"""Generate {num_competitors} synthetic competitor products for EACH of the following {len(products)} original products. The competitors should be realistic alternatives in the same category as their original product with similar features but different brands, titles, and specifications.
+
+Original Products:
+{json.dumps(products_info, indent=2)}
+
+Requirements:
+1. Generate {num_competitors} competitor products for each original product
+2. Each competitor must have ALL of the following fields:
+{COMPETITOR_FIELDS}
+
+3. Make the competitors realistic competitors - similar product type but differentiated
+4. Vary the rankings slightly to make them competitive
+5. Return ONLY a JSON object mapping each original product_id to the JSON array of its competitors, no additional text
+
+Return format:
+{{
+  "<original product_id>": [
+    {{
+      "product_id": "B0ABC123DEF",
+      "title": "...",
+      "universe": "...",
+      ...
+    }},
+    ...
+  ],
+  ...
+}}
+"""
+        return prompt
+
+    def product_info(self, product: Product) -> Dict[str, Any]:
+        """Return the fields of an original product shown to the model."""
+        return {
+            "product_id": product.product_id,
+            "title": product.title,
+            "universe": product.universe,
+            "bullet_points": product.bullet_points,
+            "min_rank_search": product.min_rank_search,
+            "avg_rank_search": product.avg_rank_search,
+            "min_rank_category": product.min_rank_category,
+            "avg_rank_category": product.avg_rank_category,
+            "retailer_category_node": product.retailer_category_node,
+            "retailer_brand_name": product.retailer_brand_name,
+            "description_filled": product.description_filled
+        }
+
     def parse_response(self, response_text: str, expected_count: int) -> List[Dict[str, Any]]:
         """Parse the LLM response into a list of product dictionaries."""
 
+        competitors_data = self.load_json_response(response_text)
+        if competitors_data is None:
+            return []
+
+        if not isinstance(competitors_data, list):
+            raise ValueError("Response is not a JSON array")
+
+        return competitors_data
+
+    def parse_batch_response(self, response_text: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Parse a batch LLM response into competitor lists keyed by original product ID."""
+
+        competitors_by_source = self.load_json_response(response_text)
+        if competitors_by_source is None:
+            return {}
+
+        if not isinstance(competitors_by_source, dict):
+            raise ValueError("Response is not a JSON object")
+
+        return competitors_by_source
+
+    def load_json_response(self, response_text: str) -> Any:
+        """Decode the JSON in an LLM response, or return None if it is not valid JSON."""
+
         # Try to extract JSON from the response
         try:
-            # Remove markdown code blocks if present
-            text = response_text.strip()
-            if text.startswith('```'):
-                # Remove ```json or ``` at the start and ``` at the end
-                lines = text.split('\n')
-                text = '\n'.join(lines[1:-1]) if len(lines) > 2 else text
+            # Take the content of a markdown code block if present
+            fence = JSON_FENCE_PATTERN.search(response_text)
+            text = fence.group(1) if fence else response_text.strip()
 
             # Parse JSON
-            competitors_data = json.loads(text)
-
-            if not isinstance(competitors_data, list):
-                raise ValueError("Response is not a JSON array")
-
-            return competitors_data
+            return json.loads(text)
 
         except json.JSONDecodeError as e:
             logger.error(f'Failed to parse JSON response: {str(e)}')
@@ -221,7 +476,7 @@ Return format:
                 self.style.ERROR(f'Failed to parse JSON response: {str(e)}')
             )
             self.stderr.write(f'Response: {response_text[:500]}...')
-            return []
+            return None
 
     def get_output_path(self) -> Path:
         """Get the output path for the synthetic competitors CSV."""
@@ -229,43 +484,16 @@ Return format:
         data_dir = Path(settings.PRODUCTS_FILE).parent
         return data_dir / 'synthetic_competitor_products.csv'
 
-    def save_to_csv(self, competitors: List[Product], output_path: Path) -> None:
-        """Save competitor products to CSV file."""
-
-        if not competitors:
-            self.stderr.write(self.style.WARNING('No competitors to save'))
-            return
-
-        # Define field names based on Product model
-        fieldnames = [
-            'product_id',
-            'title',
-            'universe',
-            'image_url',
-            'bullet_points',
-            'min_rank_search',
-            'avg_rank_search',
-            'min_rank_category',
-            'avg_rank_category',
-            'retailer_category_node',
-            'retailer_brand_name',
-            'description_filled',
-            'source_product_id'
-        ]
-
-        with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for competitor in competitors:
-                row = competitor.model_dump()
-
-                # Convert lists to JSON strings for CSV storage
-                if row.get('image_url') and isinstance(row['image_url'], list):
-                    row['image_url'] = json.dumps(row['image_url'])
-                if row.get('bullet_points') and isinstance(row['bullet_points'], list):
-                    row['bullet_points'] = json.dumps(row['bullet_points'])
-
-                writer.writerow(row)
-
-        self.stdout.write(f'Saved {len(competitors)} competitors to {output_path}')
+    def get_cache_dir(self) -> Path:
+        """Get the directory holding cached API responses, creating it if needed."""
+        cache_dir = Path(settings.BASE_DIR) / '.competitor_cache'
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return cache_dir
+
+    def competitor_row(self, competitor: Product) -> tuple:
+        """Convert a competitor product to a CSV row, in COMPETITOR_CSV_FIELDS order."""
+        # Convert lists to JSON strings for CSV storage
+        return tuple(
+            json.dumps(value) if isinstance(value, list) else value
+            for value in _competitor_values(competitor)
+        )
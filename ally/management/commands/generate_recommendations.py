@@ -61,36 +61,10 @@ class Command(BaseCommand):
 
         self.stdout.write(f'Found product: {product.title}')
 
-        # Check if a competitor report exists
-        if not competitor_report_service.has_report(product_id):
-            self.stdout.write('No competitor report found. Generating one first...')
-            try:
-                asyncio.run(
-                    AgentService.run_competitor_report(
-                        product_id=product_id,
-                        user_id=user_id,
-                        timeout_seconds=timeout
-                    )
-                )
-                self.stdout.write(self.style.SUCCESS('Competitor report generated and saved'))
-            except Exception as e:
-                self.stderr.write(
-                    self.style.WARNING(f'Failed to generate competitor report: {str(e)}')
-                )
-                self.stdout.write('Continuing with recommendations without competitor report...')
-        else:
-            self.stdout.write('Using existing competitor report from service')
-
-        # Run the recommendations agent
-        self.stdout.write('Running recommendations agent...')
-
         try:
+            # Both agent runs share a single event loop
             recommendations = asyncio.run(
-                AgentService.run_recommendations(
-                    product_id=product_id,
-                    user_id=user_id,
-                    timeout_seconds=timeout
-                )
+                self._generate_recommendations(product_id, user_id, timeout)
             )
 
             # Output the recommendations
@@ -120,3 +94,40 @@ class Command(BaseCommand):
                 self.style.ERROR(f'Error generating recommendations: {str(e)}')
             )
             raise
+
+    async def _generate_recommendations(self, product_id: str, user_id: str, timeout: int) -> str:
+        """
+        Generate a competitor report if the product has none, then the recommendations.
+
+        A failed competitor report is reported and the recommendations are generated
+        without it.
+
+        Returns:
+            The recommendations report
+        """
+        # Check if a competitor report exists
+        if not competitor_report_service.has_report(product_id):
+            self.stdout.write('No competitor report found. Generating one first...')
+            try:
+                await AgentService.run_competitor_report(
+                    product_id=product_id,
+                    user_id=user_id,
+                    timeout_seconds=timeout
+                )
+                self.stdout.write(self.style.SUCCESS('Competitor report generated and saved'))
+            except Exception as e:
+                self.stderr.write(
+                    self.style.WARNING(f'Failed to generate competitor report: {str(e)}')
+                )
+                self.stdout.write('Continuing with recommendations without competitor report...')
+        else:
+            self.stdout.write('Using existing competitor report from service')
+
+        # Run the recommendations agent
+        self.stdout.write('Running recommendations agent...')
+
+        return await AgentService.run_recommendations(
+            product_id=product_id,
+            user_id=user_id,
+            timeout_seconds=timeout
+        )
@@ -1,10 +1,98 @@
 import os
+import sys
 import json
-from typing import List, Optional, Union
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Optional, Union
 import pandas as pd
 from pydantic import BaseModel, Field, field_validator
 
 
+# Columns of the products CSV, in file order
+CSV_FIELDS = (
+    'product_id',
+    'title',
+    'universe',
+    'image_url',
+    'bullet_points',
+    'min_rank_search',
+    'avg_rank_search',
+    'min_rank_category',
+    'avg_rank_category',
+    'retailer_category_node',
+    'retailer_brand_name',
+    'description_filled',
+    'source_product_id',
+)
+
+# Low-cardinality text fields, interned at load time so duplicates share memory
+INTERNED_FIELDS = ('universe', 'retailer_category_node', 'retailer_brand_name')
+
+# Product fields stored in the CSV as JSON-encoded lists
+JSON_LIST_FIELDS = ('image_url', 'bullet_points')
+
+
+def parse_json_list(v):
+    """
+    Parse a JSON-encoded list field, wrapping a non-list value in a list.
+
+    Args:
+        v: The raw value, usually a JSON string read from the CSV
+
+    Returns:
+        The parsed list, or None if the value is None
+    """
+    if v is None:
+        return None
+    if isinstance(v, str):
+        try:
+            parsed = json.loads(v)
+            return parsed if isinstance(parsed, list) else [parsed]
+        except (json.JSONDecodeError, TypeError):
+            return [v]
+    return v
+
+
+def _intern_str(value):
+    """Intern a string value; other values are returned unchanged."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _filter_by_title(products: List['Product'], query: str, titles_lower: dict[str, str]) -> List['Product']:
+    """
+    Return the products whose title contains the query, ignoring case.
+
+    Args:
+        products: Products to search
+        query: Search query string
+        titles_lower: Cache of lowercased titles keyed by the original title. Titles
+            missing from it (e.g. edited since loading) are lowercased and added.
+
+    Returns:
+        List of matching products, in their original order
+    """
+    query_lower = query.lower()
+    matches = []
+    for product in products:
+        title = product.title
+        title_lower = titles_lower.get(title)
+        if title_lower is None:
+            title_lower = titles_lower[title] = title.lower()
+        if query_lower in title_lower:
+            matches.append(product)
+    return matches
+
+
+def _parse_json_list_cell(cell: str):
+    """Parse a raw JSON list cell from the CSV; empty cells become None."""
+    return parse_json_list(cell) if cell else None
+
+
+# read_csv converters parsing the JSON list columns while the file is read
+JSON_LIST_CONVERTERS = {field: _parse_json_list_cell for field in JSON_LIST_FIELDS}
+
+
 class Product(BaseModel):
     """Pydantic model representing a product."""
     product_id: str
@@ -25,34 +113,25 @@ class Product(BaseModel):
     @classmethod
     def parse_image_url(cls, v):
         """Parse image_url from JSON string to list if needed."""
-        if v is None:
-            return None
-        if isinstance(v, str):
-            try:
-                parsed = json.loads(v)
-                return parsed if isinstance(parsed, list) else [parsed]
-            except (json.JSONDecodeError, TypeError):
-                return [v]
-        return v
+        return parse_json_list(v)
 
     @field_validator('bullet_points', mode='before')
     @classmethod
     def parse_bullet_points(cls, v):
         """Parse bullet_points from JSON string to list if needed."""
-        if v is None:
-            return None
-        if isinstance(v, str):
-            try:
-                parsed = json.loads(v)
-                return parsed if isinstance(parsed, list) else [parsed]
-            except (json.JSONDecodeError, TypeError):
-                return [v]
-        return v
+        return parse_json_list(v)
 
     class Config:
         frozen = False
 
 
+class _UpdateBatch:
+    """Unsaved-changes flag of one open batch_updates() block."""
+
+    def __init__(self):
+        self.dirty = False
+
+
 class ProductService:
     """In-memory service for managing products loaded from CSV."""
 
@@ -67,6 +146,25 @@ class ProductService:
         self.products: List[Product] = []
         self._products_by_id: dict[str, Product] = {}
 
+        # Position of each product in self.products, so update_product can replace
+        # it without scanning the list. Must be kept in sync with self.products.
+        self._index_by_id: dict[str, int] = {}
+
+        # Lowercased titles for search_by_title, keyed by the original title. Titles
+        # can be edited in place, so entries are looked up by value rather than
+        # by position and a changed title is simply lowercased on first search.
+        self._titles_lower: dict[str, str] = {}
+
+        # The batch_updates() block open in the current context, if any. Context
+        # variables follow the agent run into its tool calls, including the ones ADK
+        # runs in worker threads, while concurrent runs each see their own batch.
+        self._current_batch: ContextVar[Optional[_UpdateBatch]] = ContextVar(
+            f'product_service_batch_{id(self)}', default=None
+        )
+
+        # Serializes CSV writes, which concurrent batches may issue at the same time
+        self._save_lock = threading.Lock()
+
         if os.path.exists(csv_file_path):
             self.load_from_csv(csv_file_path)
 
@@ -77,44 +175,45 @@ class ProductService:
         Args:
             csv_file_path: Path to the CSV file containing product data
         """
-        df = pd.read_csv(csv_file_path)
+        df = pd.read_csv(csv_file_path, converters=JSON_LIST_CONVERTERS)
         self.products = self._dataframe_to_products(df)
-        self._products_by_id = {product.product_id: product for product in self.products}
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the lookup indexes from self.products."""
+        # Build the ID indexes and the lowercased titles in a single pass
+        products_by_id: dict[str, Product] = {}
+        index_by_id: dict[str, int] = {}
+        titles_lower: dict[str, str] = {}
+        for index, product in enumerate(self.products):
+            products_by_id[product.product_id] = product
+            index_by_id.setdefault(product.product_id, index)
+            titles_lower[product.title] = product.title.lower()
+        self._products_by_id = products_by_id
+        self._index_by_id = index_by_id
+        self._titles_lower = titles_lower
 
     def _dataframe_to_products(self, df: pd.DataFrame) -> List[Product]:
         """
         Convert a pandas DataFrame to a list of Product objects.
 
         Args:
-            df: DataFrame containing product data
+            df: DataFrame containing product data, read with JSON_LIST_CONVERTERS
 
         Returns:
             List of Product objects
         """
-        products = []
-        for _, row in df.iterrows():
-            product_data = self._row_to_dict(row)
-            product = Product(**product_data)
-            products.append(product)
-        return products
+        # Repeated category and brand values share a single string object
+        for field in INTERNED_FIELDS:
+            if field in df.columns:
+                df[field] = df[field].map(_intern_str)
 
-    def _row_to_dict(self, row: pd.Series) -> dict:
-        """
-        Convert a pandas Series (row) to a dictionary suitable for Product creation.
-        Handles NaN values by converting them to None.
+        # Mask NaN values to None once for the whole frame, instead of per cell
+        records = df.astype(object).where(df.notna(), None).to_dict('records')
 
-        Args:
-            row: Pandas Series representing a row of data
-
-        Returns:
-            Dictionary with product data
-        """
-        data = row.to_dict()
-        # Convert NaN values to None
-        for key, value in data.items():
-            if pd.isna(value):
-                data[key] = None
-        return data
+        # The CSV is written by this service and its JSON list columns are already
+        # parsed by the read_csv converters, so construct without running validation
+        return [Product.model_construct(**record) for record in records]
 
     def get_all_products(self) -> List[Product]:
         """
@@ -156,8 +255,7 @@ class ProductService:
         Returns:
             List of products matching the query
         """
-        query_lower = query.lower()
-        return [p for p in self.products if query_lower in p.title.lower()]
+        return _filter_by_title(self.products, query, self._titles_lower)
 
     def update_product(self, product: Product) -> None:
         """
@@ -176,11 +274,8 @@ class ProductService:
         # Update in dictionary
         self._products_by_id[product.product_id] = product
 
-        # Find and replace in products list
-        for i, p in enumerate(self.products):
-            if p.product_id == product.product_id:
-                self.products[i] = product
-                break
+        # Replace in products list
+        self.products[self._index_by_id[product.product_id]] = product
 
     def save_to_csv(self, csv_file_path: str = None) -> None:
         """
@@ -196,42 +291,55 @@ class ProductService:
             csv_file_path = self.csv_file_path
 
         try:
-            # Convert products to DataFrame
-            products_data = []
-            for product in self.products:
-                product_dict = {
-                    'product_id': product.product_id,
-                    'title': product.title,
-                    'universe': product.universe,
-                    'image_url': json.dumps(product.image_url) if product.image_url else None,
-                    'bullet_points': json.dumps(product.bullet_points) if product.bullet_points else None,
-                    'min_rank_search': product.min_rank_search,
-                    'avg_rank_search': product.avg_rank_search,
-                    'min_rank_category': product.min_rank_category,
-                    'avg_rank_category': product.avg_rank_category,
-                    'retailer_category_node': product.retailer_category_node,
-                    'retailer_brand_name': product.retailer_brand_name,
-                    'description_filled': product.description_filled,
-                    'source_product_id': product.source_product_id
-                }
-                products_data.append(product_dict)
+            # Build the DataFrame column by column
+            products = self.products
+            columns = {
+                field: [getattr(product, field) for product in products]
+                for field in CSV_FIELDS
+            }
+            for field in JSON_LIST_FIELDS:
+                columns[field] = [json.dumps(value) if value else None for value in columns[field]]
 
             # Create DataFrame and save to CSV
-            df = pd.DataFrame(products_data)
+            df = pd.DataFrame(columns)
             df.to_csv(csv_file_path, index=False)
 
         except Exception as e:
             raise IOError(f"Failed to save products to CSV: {str(e)}")
 
+    def save(self) -> None:
+        """
+        Save all products to the original CSV file without reloading them.
+
+        The in-memory products are the authoritative copy, so there is nothing to
+        re-read after writing. Inside batch_updates() the write is deferred until
+        the batch ends.
+
+        Raises:
+            IOError: If the file cannot be written
+        """
+        # Inside batch_updates() the write happens once when the batch ends
+        batch = self._current_batch.get()
+        if batch is not None:
+            batch.dirty = True
+            return
+
+        with self._save_lock:
+            self.save_to_csv(self.csv_file_path)
+
     def save_and_reload(self, csv_file_path: str = None) -> None:
         """
-        Save all products to CSV and then reload from the file to ensure consistency.
+        Save all products to CSV and refresh the in-memory indexes.
+
+        The in-memory products are the authoritative copy, so the indexes are rebuilt
+        from them instead of parsing the file that was just written. Use
+        load_from_csv to explicitly re-read the file.
 
         Args:
             csv_file_path: Path to save the CSV file (defaults to the original path)
 
         Raises:
-            IOError: If the file cannot be written or read
+            IOError: If the file cannot be written
         """
         if csv_file_path is None:
             csv_file_path = self.csv_file_path
@@ -239,8 +347,40 @@ class ProductService:
         # Save to CSV
         self.save_to_csv(csv_file_path)
 
-        # Reload from CSV to ensure data consistency
-        self.load_from_csv(csv_file_path)
+        # Keep the indexes consistent with the products that were saved
+        self._rebuild_indexes()
+
+    @contextmanager
+    def batch_updates(self) -> Iterator[None]:
+        """
+        Defer save() calls until the batch ends.
+
+        While a batch is open, save() calls made in its context (the same task or
+        thread, and the tasks and threads started from it) only record that there
+        are unsaved changes; the products are written to disk once, when the batch
+        exits. This turns a series of single-field updates (e.g. the tool calls of an
+        agent run) into one CSV write.
+
+        A nested batch joins the one already open in its context. Concurrent batches
+        are independent: each one writes its changes when it closes, without waiting
+        for the others, so a finished run is on disk even if a later one never ends.
+
+        Raises:
+            IOError: If the deferred save fails
+        """
+        if self._current_batch.get() is not None:
+            # The enclosing batch saves when it exits
+            yield
+            return
+
+        batch = _UpdateBatch()
+        token = self._current_batch.set(batch)
+        try:
+            yield
+        finally:
+            self._current_batch.reset(token)
+            if batch.dirty:
+                self.save()
 
 
 class CompetitorProductService:
@@ -258,6 +398,9 @@ class CompetitorProductService:
         self._competitors_by_id: dict[str, Product] = {}
         self._competitors_by_source: dict[str, List[Product]] = {}
 
+        # Lowercased titles for the title searches, keyed by the original title
+        self._titles_lower: dict[str, str] = {}
+
         if os.path.exists(csv_file_path):
             self.load_from_csv(csv_file_path)
 
@@ -268,52 +411,46 @@ class CompetitorProductService:
         Args:
             csv_file_path: Path to the CSV file containing competitor product data
         """
-        df = pd.read_csv(csv_file_path)
+        df = pd.read_csv(csv_file_path, converters=JSON_LIST_CONVERTERS)
         self.competitors = self._dataframe_to_products(df)
-        self._competitors_by_id = {product.product_id: product for product in self.competitors}
 
-        # Build index by source_product_id for efficient lookups
-        self._competitors_by_source = {}
+        # Build the ID index, the index by source_product_id and the lowercased
+        # titles in a single pass
+        competitors_by_id: dict[str, Product] = {}
+        competitors_by_source: dict[str, List[Product]] = {}
+        titles_lower: dict[str, str] = {}
         for competitor in self.competitors:
+            competitors_by_id[competitor.product_id] = competitor
+            titles_lower[competitor.title] = competitor.title.lower()
             if competitor.source_product_id:
-                if competitor.source_product_id not in self._competitors_by_source:
-                    self._competitors_by_source[competitor.source_product_id] = []
-                self._competitors_by_source[competitor.source_product_id].append(competitor)
+                if competitor.source_product_id not in competitors_by_source:
+                    competitors_by_source[competitor.source_product_id] = []
+                competitors_by_source[competitor.source_product_id].append(competitor)
+        self._competitors_by_id = competitors_by_id
+        self._competitors_by_source = competitors_by_source
+        self._titles_lower = titles_lower
 
     def _dataframe_to_products(self, df: pd.DataFrame) -> List[Product]:
         """
         Convert a pandas DataFrame to a list of Product objects.
 
         Args:
-            df: DataFrame containing competitor product data
+            df: DataFrame containing competitor product data, read with JSON_LIST_CONVERTERS
 
         Returns:
             List of Product objects
         """
-        products = []
-        for _, row in df.iterrows():
-            product_data = self._row_to_dict(row)
-            product = Product(**product_data)
-            products.append(product)
-        return products
+        # Repeated category and brand values share a single string object
+        for field in INTERNED_FIELDS:
+            if field in df.columns:
+                df[field] = df[field].map(_intern_str)
 
-    def _row_to_dict(self, row: pd.Series) -> dict:
-        """
-        Convert a pandas Series (row) to a dictionary suitable for Product creation.
-        Handles NaN values by converting them to None.
+        # Mask NaN values to None once for the whole frame, instead of per cell
+        records = df.astype(object).where(df.notna(), None).to_dict('records')
 
-        Args:
-            row: Pandas Series representing a row of data
-
-        Returns:
-            Dictionary with product data
-        """
-        data = row.to_dict()
-        # Convert NaN values to None
-        for key, value in data.items():
-            if pd.isna(value):
-                data[key] = None
-        return data
+        # The CSV is written by this service and its JSON list columns are already
+        # parsed by the read_csv converters, so construct without running validation
+        return [Product.model_construct(**record) for record in records]
 
     def get_all_competitors(self) -> List[Product]:
         """
@@ -388,8 +525,7 @@ class CompetitorProductService:
         Returns:
             List of competitor products matching the query
         """
-        query_lower = query.lower()
-        return [p for p in self.competitors if query_lower in p.title.lower()]
+        return _filter_by_title(self.competitors, query, self._titles_lower)
 
     def search_competitors_for_product(self, source_product_id: str, query: str) -> List[Product]:
         """
@@ -403,11 +539,51 @@ class CompetitorProductService:
             List of competitor products matching the query for the source product
         """
         competitors = self.get_competitors_for_product(source_product_id)
-        query_lower = query.lower()
-        return [p for p in competitors if query_lower in p.title.lower()]
+        return _filter_by_title(competitors, query, self._titles_lower)
+
+
+class _LazyService:
+    """
+    Proxy that creates a service on first use.
+
+    Attribute reads, writes and deletes are forwarded to the service, so the proxy
+    can be used in its place, including by mock.patch. Modules that import the proxy without using it never load
+    the CSV file.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        """
+        Initialize the proxy.
+
+        Args:
+            factory: Callable returning the service instance
+        """
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _get_instance(self) -> Any:
+        """Return the service, creating it on the first call."""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_instance(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._get_instance(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._get_instance(), name)
 
 
 # Initialize the global product service instances
 from django.conf import settings
-product_service = ProductService(settings.PRODUCTS_FILE)
-competitor_service = CompetitorProductService(settings.COMPETITORS_FILE)
+product_service = _LazyService(lambda: ProductService(settings.PRODUCTS_FILE))
+competitor_service = _LazyService(lambda: CompetitorProductService(settings.COMPETITORS_FILE))
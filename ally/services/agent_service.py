@@ -1,5 +1,7 @@
+import asyncio
+import itertools
 import logging
-import uuid
+import os
 from typing import Optional
 
 from google.adk.runners import Runner
@@ -11,13 +13,65 @@ from google.genai.types import Content, Part
 
 from ally.ai.agents.competitor_report import competitor_report_agent
 from ally.ai.agents.recommendations import recommendations_agent
+from ally.ai.agents.recommendations.tools import load_aws_guidelines
 from ally.ai.agents.finalize import final_agent
+from ally.product_service import product_service
 from ally.services.competitor_report_service import competitor_report_service
 from ally.services.product_recommendation_service import product_recommendation_service
 from ally.services.summarization_service import summarization_service
 
 logger = logging.getLogger(__name__)
 
+# Shared in-memory services. Every run gets its own session_id, so the runs stay
+# isolated while the services (and the runners built on them) are reused.
+_session_service = InMemorySessionService()
+_artifact_service = InMemoryArtifactService()
+_memory_service = InMemoryMemoryService()
+_runners = {}
+
+# User message that starts each agent's run, keyed by app name
+_USER_MESSAGES = {
+    "competitor_report_agent": "Generate a comprehensive competitor report for product ID: {product_id}",
+    "recommendations_agent": "Generate 3 actionable product optimization recommendations for product ID: {product_id}",
+    "final_agent": "Finalize product updates and create summary for product ID: {product_id}",
+}
+
+# Session ids only need to be unique within the shared in-memory session service
+_session_ids = itertools.count()
+_session_prefix = f'{os.getpid()}-'
+
+
+def _new_session_id() -> str:
+    """Return a session id that is unique within this process."""
+    return f'{_session_prefix}{next(_session_ids)}'
+
+
+def _get_runner(agent_name: str, agent) -> Runner:
+    """
+    Return the cached runner for an agent, building a new one if the agent changed.
+
+    A runner is bound to its root agent, so agents that are rebuilt per product
+    (the recommendations agent) replace the cached runner instead of reusing it.
+
+    Args:
+        agent_name: The app name the runner is registered under
+        agent: The root agent to run
+
+    Returns:
+        A runner for the agent backed by the shared services
+    """
+    runner = _runners.get(agent_name)
+    if runner is None or runner.agent is not agent:
+        runner = Runner(
+            agent=agent,
+            app_name=agent_name,
+            session_service=_session_service,
+            artifact_service=_artifact_service,
+            memory_service=_memory_service,
+        )
+        _runners[agent_name] = runner
+    return runner
+
 
 class AgentService:
     """Service for running AI agents with proper session management."""
@@ -45,68 +99,14 @@ class AgentService:
         """
         logger.info(f'Starting competitor report for product: {product_id}')
 
-        # Create the agent
-        agent = competitor_report_agent(product_id)
-        agent_name = "competitor_report_agent"
-
-        # Create session service (in-memory)
-        session_service = InMemorySessionService()
-
-        # Create a new session
-        session_id = str(uuid.uuid4())
-        logger.info(f'Creating session: {session_id}')
-
-        await session_service.create_session(
-            app_name=agent_name,
+        report = await AgentService._run_agent(
+            agent=competitor_report_agent(product_id),
+            agent_name="competitor_report_agent",
+            product_id=product_id,
             user_id=user_id,
-            session_id=session_id,
-            state={
-                "user_id": user_id,
-                "product_id": product_id,
-            },
-        )
-
-        logger.info(f'Session created: {session_id}')
-
-        # Create the runner with in-memory services
-        runner = Runner(
-            agent=agent,
-            app_name=agent_name,
-            session_service=session_service,
-            artifact_service=InMemoryArtifactService(),
-            memory_service=InMemoryMemoryService(),
-        )
-
-        logger.info('Starting agent execution')
-
-        # Prepare the user message as a Content object
-        message_text = f"Generate a comprehensive competitor report for product ID: {product_id}"
-        user_message = Content(
-            role="user",
-            parts=[Part(text=message_text)]
+            timeout_seconds=timeout_seconds,
         )
 
-        # Run the agent and collect events
-        events = []
-        try:
-            async for event in runner.run_async(
-                user_id=user_id,
-                session_id=session_id,
-                new_message=user_message,
-                run_config=RunConfig(streaming_mode=StreamingMode.NONE),
-            ):
-                events.append(event)
-                logger.debug(f'Received event: {event.type if hasattr(event, "type") else type(event).__name__}')
-
-        except Exception as e:
-            logger.error(f'Error during agent execution: {str(e)}', exc_info=True)
-            raise ValueError(f'Agent execution failed: {str(e)}')
-
-        # Extract the final response from events
-        report = AgentService._extract_final_response(events)
-
-        logger.info(f'Agent execution completed. Generated {len(events)} events.')
-
         # Save the report using the CompetitorReportService
         competitor_report_service.save_report(product_id, report)
         logger.info(f'Saved competitor report for product: {product_id}')
@@ -143,74 +143,21 @@ class AgentService:
         else:
             logger.info(f'No competitor report found for product: {product_id}')
 
-        # Create the agent
-        agent = recommendations_agent(product_id, competitor_report)
-        agent_name = "recommendations_agent"
-
-        # Create session service (in-memory)
-        session_service = InMemorySessionService()
-
-        # Create a new session
-        session_id = str(uuid.uuid4())
-        logger.info(f'Creating session: {session_id}')
-
         # Include competitor report in session state
-        session_state = {
-            "user_id": user_id,
-            "product_id": product_id,
-        }
+        extra_state = {"competitor_report": competitor_report} if competitor_report else None
 
-        if competitor_report:
-            session_state["competitor_report"] = competitor_report
+        # Parsing the guidelines PDF on a cold cache is blocking, so keep it off the event loop
+        guidelines = await asyncio.to_thread(load_aws_guidelines)
 
-        await session_service.create_session(
-            app_name=agent_name,
+        recommendations = await AgentService._run_agent(
+            agent=recommendations_agent(product_id, competitor_report, guidelines),
+            agent_name="recommendations_agent",
+            product_id=product_id,
             user_id=user_id,
-            session_id=session_id,
-            state=session_state,
+            timeout_seconds=timeout_seconds,
+            extra_state=extra_state,
         )
 
-        logger.info(f'Session created: {session_id}')
-
-        # Create the runner with in-memory services
-        runner = Runner(
-            agent=agent,
-            app_name=agent_name,
-            session_service=session_service,
-            artifact_service=InMemoryArtifactService(),
-            memory_service=InMemoryMemoryService(),
-        )
-
-        logger.info('Starting agent execution')
-
-        # Prepare the user message as a Content object
-        message_text = f"Generate 3 actionable product optimization recommendations for product ID: {product_id}"
-        user_message = Content(
-            role="user",
-            parts=[Part(text=message_text)]
-        )
-
-        # Run the agent and collect events
-        events = []
-        try:
-            async for event in runner.run_async(
-                user_id=user_id,
-                session_id=session_id,
-                new_message=user_message,
-                run_config=RunConfig(streaming_mode=StreamingMode.NONE),
-            ):
-                events.append(event)
-                logger.debug(f'Received event: {event.type if hasattr(event, "type") else type(event).__name__}')
-
-        except Exception as e:
-            logger.error(f'Error during agent execution: {str(e)}', exc_info=True)
-            raise ValueError(f'Agent execution failed: {str(e)}')
-
-        # Extract the final response from events
-        recommendations = AgentService._extract_final_response(events)
-
-        logger.info(f'Agent execution completed. Generated {len(events)} events.')
-
         # Save the recommendations using the ProductRecommendationService
         product_recommendation_service.save_recommendations(product_id, recommendations)
         logger.info(f'Saved recommendations for product: {product_id}')
@@ -240,91 +187,132 @@ class AgentService:
         """
         logger.info(f'Starting final agent for product: {product_id}')
 
-        # Create the final sequential agent
-        agent = final_agent(product_id)
-        agent_name = "final_agent"
+        # The update agents save the product after every tool call; batching writes
+        # the catalog to disk once, when the run ends.
+        with product_service.batch_updates():
+            summary = await AgentService._run_agent(
+                # Sequential updates followed by the summary
+                agent=final_agent(product_id),
+                agent_name="final_agent",
+                product_id=product_id,
+                user_id=user_id,
+                timeout_seconds=timeout_seconds,
+            )
+
+        # Save the summary using the SummarizationService
+        summarization_service.save_summarization(product_id, summary)
+        logger.info(f'Saved summarization for product: {product_id}')
+
+        return summary
+
+    @staticmethod
+    async def _run_agent(
+        agent,
+        agent_name: str,
+        product_id: str,
+        user_id: str,
+        timeout_seconds: float,
+        extra_state: Optional[dict] = None,
+    ) -> str:
+        """
+        Run an agent in a fresh session and return its final response.
+
+        Args:
+            agent: The root agent to run
+            agent_name: The app name for the runner and session, which also selects
+                the user message
+            product_id: The product ID stored in the session state
+            user_id: The user ID for the session
+            timeout_seconds: Maximum time to wait for the run to complete
+            extra_state: Additional session state for the agent
 
-        # Create session service (in-memory)
-        session_service = InMemorySessionService()
+        Returns:
+            The final response text
 
+        Raises:
+            ValueError: If the agent fails
+            TimeoutError: If the agent execution exceeds the timeout
+        """
         # Create a new session
-        session_id = str(uuid.uuid4())
+        session_id = _new_session_id()
         logger.info(f'Creating session: {session_id}')
 
-        await session_service.create_session(
+        await _session_service.create_session(
             app_name=agent_name,
             user_id=user_id,
             session_id=session_id,
             state={
                 "user_id": user_id,
                 "product_id": product_id,
+                **(extra_state or {}),
             },
         )
 
         logger.info(f'Session created: {session_id}')
 
-        # Create the runner with in-memory services
-        runner = Runner(
-            agent=agent,
-            app_name=agent_name,
-            session_service=session_service,
-            artifact_service=InMemoryArtifactService(),
-            memory_service=InMemoryMemoryService(),
-        )
+        runner = _get_runner(agent_name, agent)
 
-        logger.info('Starting final agent execution')
+        logger.info(f'Starting {agent_name} execution')
 
         # Prepare the user message as a Content object
-        message_text = f"Finalize product updates and create summary for product ID: {product_id}"
+        message_text = _USER_MESSAGES[agent_name].format(product_id=product_id)
         user_message = Content(
             role="user",
             parts=[Part(text=message_text)]
         )
 
-        # Run the agent and collect events
-        events = []
-        try:
+        # Run the agent, keeping only the last event
+        async def collect():
+            last_event = None
+            event_count = 0
             async for event in runner.run_async(
                 user_id=user_id,
                 session_id=session_id,
                 new_message=user_message,
                 run_config=RunConfig(streaming_mode=StreamingMode.NONE),
             ):
-                events.append(event)
+                last_event = event
+                event_count += 1
                 logger.debug(f'Received event: {event.type if hasattr(event, "type") else type(event).__name__}')
+            return last_event, event_count
 
+        try:
+            last_event, event_count = await asyncio.wait_for(collect(), timeout=timeout_seconds)
+
+        except asyncio.TimeoutError:
+            logger.error(f'Agent {agent_name} exceeded the {timeout_seconds}s timeout')
+            raise TimeoutError(f'Agent {agent_name} exceeded the {timeout_seconds}s timeout')
         except Exception as e:
             logger.error(f'Error during agent execution: {str(e)}', exc_info=True)
             raise ValueError(f'Agent execution failed: {str(e)}')
+        finally:
+            await _session_service.delete_session(
+                app_name=agent_name, user_id=user_id, session_id=session_id
+            )
 
-        # Extract the final response from events
-        summary = AgentService._extract_final_response(events)
-
-        logger.info(f'Agent execution completed. Generated {len(events)} events.')
+        logger.info(f'Agent execution completed. Generated {event_count} events.')
 
-        # Save the summary using the SummarizationService
-        summarization_service.save_summarization(product_id, summary)
-        logger.info(f'Saved summarization for product: {product_id}')
-
-        return summary
+        # Extract the final response from the last event
+        return AgentService._extract_final_response(last_event)
 
     @staticmethod
-    def _extract_final_response(events) -> str:
+    def _extract_final_response(final_event) -> str:
         """
-        Extract the final agent response from the event stream.
+        Extract the final agent response from the last event of a run.
 
         Args:
-            events: List of events from the agent runner
+            final_event: The last event from the agent runner, or None if there was none
 
         Returns:
             The final response text
         """
-        if events:
-            final_event = events[-1]
-            if hasattr(final_event, 'content') and final_event.content:
-                content_obj = final_event.content
-                if hasattr(content_obj, 'parts') and content_obj.parts:
-                    response_text = content_obj.parts[0].text if hasattr(content_obj.parts[0], 'text') else str(content_obj.parts[0])
-                    return response_text
-            return str(final_event)
-        return 'No response generated'
+        if final_event is None:
+            return 'No response generated'
+
+        content = getattr(final_event, 'content', None)
+        parts = getattr(content, 'parts', None) if content else None
+        if parts:
+            first = parts[0]
+            text = getattr(first, 'text', None)
+            return text if text is not None else str(first)
+        return str(final_event)
@@ -0,0 +1,462 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Raw descriptor flags; O_BINARY only exists (and matters) on Windows
+_OPEN_FLAGS = getattr(os, 'O_CLOEXEC', 0) | getattr(os, 'O_BINARY', 0)
+
+
+def _read_file(path: str) -> bytes:
+    """
+    Read a whole file with a single read call sized from fstat.
+
+    Skips the buffered file object stack, which only adds copies for a one-shot read.
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        The file contents
+
+    Raises:
+        OSError: If the file cannot be opened or read
+    """
+    fd = os.open(path, os.O_RDONLY | _OPEN_FLAGS)
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size)
+        if len(data) < size:
+            # Short read; collect the rest
+            chunks = [data]
+            while chunk := os.read(fd, 1 << 16):
+                chunks.append(chunk)
+            data = b''.join(chunks)
+        return data
+    finally:
+        os.close(fd)
+
+
+def _write_file(path: str, data: bytes) -> None:
+    """
+    Create or truncate a file and write data to it through a raw descriptor.
+
+    Args:
+        path: Path of the file
+        data: Contents to write
+
+    Raises:
+        OSError: If the file cannot be opened or written
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _OPEN_FLAGS, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+class FileBackedCache:
+    """
+    Markdown documents keyed by product ID, persisted to disk with a bounded in-memory cache.
+
+    Each document is stored as ``<file_prefix><product_id>.md`` in the cache directory.
+    The most recently used documents are kept in memory, up to ``maxsize`` entries and
+    ``max_bytes`` of content. When the size budget is exceeded, documents larger than
+    ``large_document_size`` are evicted before the least recently used ones, since
+    dropping one of them frees the most memory for a single extra disk read.
+
+    Cached documents are held as UTF-8 bytes and decoded on each lookup. Generated
+    markdown often contains a few non-ASCII characters, which would otherwise make
+    CPython store the whole string with 2 or 4 bytes per character.
+
+    ``has`` answers from memory: besides the cached documents it keeps the set of IDs
+    found on disk, rescanned at most every ``disk_ids_ttl`` seconds and kept current by
+    ``save`` and ``delete``. Files added or removed by other processes show up after
+    the next rescan.
+
+    The documents are used from several worker threads at once, so the in-memory cache,
+    its byte count and the disk IDs are only read and changed while holding a lock. Disk
+    reads, writes and directory scans happen outside it.
+    """
+
+    FILE_SUFFIX = '.md'
+
+    def __init__(
+        self,
+        directory: str,
+        file_prefix: str,
+        label: str,
+        maxsize: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        large_document_size: int = 12 * 1024,
+        disk_ids_ttl: float = 30.0,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Directory to store the document files
+            file_prefix: Filename prefix in front of the product ID
+            label: Human-readable name of the documents, used in log and error messages
+            maxsize: Maximum number of documents kept in memory
+            max_bytes: Maximum total size of the documents kept in memory
+            large_document_size: Size above which a document is evicted first when the
+                cache is over max_bytes
+            disk_ids_ttl: Seconds before has() rescans the directory for document IDs
+        """
+        self.directory = Path(directory)
+        self._directory_str = os.fspath(self.directory)
+        self.file_prefix = file_prefix
+        # Slice that cuts the product ID out of a document filename
+        self._product_id_slice = slice(len(file_prefix), -len(self.FILE_SUFFIX))
+        self.label = label
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.large_document_size = large_document_size
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._cache_bytes = 0
+        # Guards _cache, _cache_bytes and the _disk_ids bookkeeping
+        self._lock = threading.Lock()
+        self.disk_ids_ttl = disk_ids_ttl
+        self._disk_ids: set[str] = set()
+        self._disk_ids_expire_at = 0.0
+        # Saves (True) and deletes (False) made while directory scans are running, which
+        # a scan may have missed; re-applied to its result before it replaces _disk_ids
+        self._disk_id_changes: dict[str, bool] = {}
+        self._disk_id_scans = 0
+
+        # Ensure the directory exists
+        self.directory.mkdir(parents=True, exist_ok=True)
+        logger.info(f'{type(self).__name__} initialized with {label} directory: {self.directory}')
+
+    def _get_file_path(self, product_id: str) -> str:
+        """
+        Get the file path for a product's document.
+
+        Built as a plain string, since this runs on every lookup and a Path would be
+        parsed and normalized each time.
+
+        Args:
+            product_id: The product ID
+
+        Returns:
+            Path of the document file
+        """
+        return os.path.join(self._directory_str, f'{self.file_prefix}{product_id}{self.FILE_SUFFIX}')
+
+    def _cache_put(self, product_id: str, content: bytes) -> None:
+        """
+        Store a document in memory, evicting others to stay within maxsize and max_bytes.
+
+        Must be called with the lock held.
+
+        Args:
+            product_id: The product ID
+            content: The UTF-8 encoded document content
+        """
+        self._cache_pop(product_id)
+        self._cache[product_id] = content
+        self._cache_bytes += len(content)
+
+        if self._cache_bytes > self.max_bytes:
+            # Large documents go first, least recently used among them first
+            large_ids = [
+                cached_id for cached_id, cached in self._cache.items()
+                if len(cached) > self.large_document_size and cached_id != product_id
+            ]
+            for large_id in large_ids:
+                if self._cache_bytes <= self.max_bytes:
+                    break
+                self._cache_pop(large_id)
+
+        while len(self._cache) > 1 and (
+            len(self._cache) > self.maxsize or self._cache_bytes > self.max_bytes
+        ):
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+
+    def _cache_pop(self, product_id: str) -> Optional[bytes]:
+        """
+        Remove a document from memory.
+
+        Must be called with the lock held.
+
+        Args:
+            product_id: The product ID
+
+        Returns:
+            The removed UTF-8 encoded document content, or None if it was not cached
+        """
+        content = self._cache.pop(product_id, None)
+        if content is not None:
+            self._cache_bytes -= len(content)
+        return content
+
+    def save(self, product_id: str, content: str) -> None:
+        """
+        Save a document both in memory and to disk.
+
+        Args:
+            product_id: The product ID
+            content: The document content
+
+        Raises:
+            ValueError: If product_id or content is empty
+            IOError: If file write fails
+        """
+        if not product_id:
+            raise ValueError("product_id cannot be empty")
+
+        if not content:
+            raise ValueError(f"{self.label} cannot be empty")
+
+        # Save to memory cache
+        data = content.encode('utf-8')
+        with self._lock:
+            self._cache_put(product_id, data)
+        logger.debug(f'Cached {self.label} for product: {product_id}')
+
+        # Save to disk (overwrite if exists). The content goes to a temporary file that is
+        # renamed into place, so a crash mid-write never leaves a truncated document.
+        # The name is unique per thread, since threads may save the same product at once.
+        file_path = self._get_file_path(product_id)
+        tmp_path = f'{file_path}.tmp.{os.getpid()}.{threading.get_ident()}'
+
+        try:
+            _write_file(tmp_path, data)
+            os.replace(tmp_path, file_path)
+            self._set_on_disk(product_id, True)
+            logger.info(f'Saved {self.label} to: {file_path}')
+        except Exception as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            logger.error(f'Failed to save {self.label} to disk: {str(e)}', exc_info=True)
+            raise IOError(f'Failed to save {self.label} to {file_path}: {str(e)}')
+
+    def get(self, product_id: str) -> Optional[str]:
+        """
+        Retrieve a document, checking memory cache first, then disk.
+
+        Args:
+            product_id: The product ID
+
+        Returns:
+            The document content if found, None otherwise
+        """
+        if not product_id:
+            logger.warning(f"Lookup of {self.label} called with empty product_id")
+            return None
+
+        # Check in-memory cache first
+        with self._lock:
+            data = self._cache.get(product_id)
+            if data is not None:
+                self._cache.move_to_end(product_id)
+        if data is not None:
+            logger.debug(f'Retrieved {self.label} from cache for product: {product_id}')
+            return data.decode('utf-8')
+
+        # Check file system; a missing file is the common miss, so open it directly
+        file_path = self._get_file_path(product_id)
+
+        try:
+            data = _read_file(file_path)
+            content = data.decode('utf-8')
+        except FileNotFoundError:
+            logger.debug(f'No {self.label} found for product: {product_id}')
+            return None
+        except Exception as e:
+            logger.error(f'Failed to load {self.label} from disk: {str(e)}', exc_info=True)
+            return None
+
+        # Cache it for future requests
+        with self._lock:
+            self._cache_put(product_id, data)
+        logger.info(f'Loaded {self.label} from disk for product: {product_id}')
+        return content
+
+    def has(self, product_id: str) -> bool:
+        """
+        Check if a document exists for a product.
+
+        Args:
+            product_id: The product ID
+
+        Returns:
+            True if a document exists, False otherwise
+        """
+        if not product_id:
+            return False
+
+        # Check cache first
+        with self._lock:
+            if product_id in self._cache:
+                return True
+            stale = time.monotonic() >= self._disk_ids_expire_at
+
+        # Check the IDs last seen on disk, rescanning once they are stale
+        if stale:
+            self._refresh_disk_ids()
+        with self._lock:
+            return product_id in self._disk_ids
+
+    def _set_on_disk(self, product_id: str, on_disk: bool) -> None:
+        """
+        Record that this process saved or deleted a product's document file.
+
+        Args:
+            product_id: The product ID
+            on_disk: True after a save, False after a delete
+        """
+        with self._lock:
+            if on_disk:
+                self._disk_ids.add(product_id)
+            else:
+                self._disk_ids.discard(product_id)
+            if self._disk_id_scans:
+                self._disk_id_changes[product_id] = on_disk
+
+    def _refresh_disk_ids(self) -> None:
+        """
+        Rescan the directory for the IDs of documents on disk.
+
+        The scan runs outside the lock, so saves and deletes made during it are applied
+        to its result before it replaces the current IDs.
+        """
+        with self._lock:
+            self._disk_id_scans += 1
+
+        disk_ids = set(self.list_ids())
+
+        with self._lock:
+            for product_id, on_disk in self._disk_id_changes.items():
+                if on_disk:
+                    disk_ids.add(product_id)
+                else:
+                    disk_ids.discard(product_id)
+            self._disk_id_scans -= 1
+            if not self._disk_id_scans:
+                self._disk_id_changes.clear()
+            self._disk_ids = disk_ids
+            self._disk_ids_expire_at = time.monotonic() + self.disk_ids_ttl
+
+    def delete(self, product_id: str) -> bool:
+        """
+        Delete a document from both memory and disk.
+
+        Args:
+            product_id: The product ID
+
+        Returns:
+            True if a document was deleted, False if none existed
+        """
+        if not product_id:
+            return False
+
+        deleted = False
+
+        # Remove from cache
+        with self._lock:
+            removed = self._cache_pop(product_id)
+        if removed is not None:
+            deleted = True
+            logger.debug(f'Removed {self.label} from cache for product: {product_id}')
+
+        # Remove from disk
+        self._set_on_disk(product_id, False)
+        file_path = self._get_file_path(product_id)
+        try:
+            os.unlink(file_path)
+            deleted = True
+            logger.info(f'Deleted {self.label} file: {file_path}')
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f'Failed to delete {self.label} file: {str(e)}', exc_info=True)
+
+        return deleted
+
+    def clear_cache(self) -> None:
+        """Clear the in-memory cache of documents."""
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+        logger.info(f'Cleared {self.label} cache')
+
+    def warm_cache(self, max_files: Optional[int] = None) -> int:
+        """
+        Load the most recently modified documents on disk into memory.
+
+        Args:
+            max_files: Maximum number of documents to load (default: maxsize)
+
+        Returns:
+            Number of documents loaded
+        """
+        if max_files is None:
+            max_files = self.maxsize
+
+        prefix = self.file_prefix
+        suffix = self.FILE_SUFFIX
+        product_id_slice = self._product_id_slice
+
+        try:
+            with os.scandir(self.directory) as entries:
+                files = [
+                    (entry.stat().st_mtime, entry.name[product_id_slice], entry.path)
+                    for entry in entries
+                    if entry.name.startswith(prefix) and entry.name.endswith(suffix) and entry.is_file()
+                ]
+        except Exception as e:
+            logger.error(f'Failed to list {self.label} files: {str(e)}', exc_info=True)
+            return 0
+
+        # Newest last, so the newest documents end up most recently used
+        newest = sorted(files, reverse=True)[:max_files]
+        loaded = 0
+        for _, product_id, file_path in reversed(newest):
+            try:
+                data = _read_file(file_path)
+                # Only cache documents that will decode on lookup
+                data.decode('utf-8')
+                with self._lock:
+                    self._cache_put(product_id, data)
+                loaded += 1
+            except Exception as e:
+                logger.warning(f'Failed to preload {self.label} from {file_path}: {str(e)}')
+
+        logger.info(f'Preloaded {loaded} {self.label} files into the cache')
+        return loaded
+
+    def list_ids(self) -> list[str]:
+        """
+        Get all product IDs that have documents on disk.
+
+        Returns:
+            List of product IDs that have documents
+        """
+        product_ids = []
+        prefix = self.file_prefix
+        suffix = self.FILE_SUFFIX
+        product_id_slice = self._product_id_slice
+
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    # Extract product_id from filename, e.g. 'competitive_report_B0ABC123.md'
+                    name = entry.name
+                    if name.startswith(prefix) and name.endswith(suffix) and entry.is_file():
+                        product_ids.append(name[product_id_slice])
+        except Exception as e:
+            logger.error(f'Failed to list {self.label} files: {str(e)}', exc_info=True)
+
+        return product_ids
@@ -1,6 +1,7 @@
+import io
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 import fitz  # PyMuPDF
 
@@ -11,12 +12,13 @@ class PDFExtractor:
     """Service for extracting text and tables from PDF files."""
 
     @staticmethod
-    def extract_from_file(pdf_path: str) -> Dict[str, Any]:
+    def extract_from_file(pdf_path: str, include_tables: bool = True) -> Dict[str, Any]:
         """
         Extract all content from a PDF file including text and tables.
 
         Args:
             pdf_path: Path to the PDF file
+            include_tables: Whether to detect tables; when False, every page has no tables
 
         Returns:
             Dictionary containing:
@@ -28,12 +30,7 @@ class PDFExtractor:
             FileNotFoundError: If the PDF file doesn't exist
             ValueError: If the file is not a valid PDF
         """
-        pdf_file = Path(pdf_path)
-        if not pdf_file.exists():
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
-
-        if not pdf_file.suffix.lower() == '.pdf':
-            raise ValueError(f"File must be a PDF: {pdf_path}")
+        PDFExtractor._validate_path(pdf_path)
 
         logger.info(f"Extracting content from PDF: {pdf_path}")
 
@@ -48,9 +45,7 @@ class PDFExtractor:
             pages = []
             all_text = []
 
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                page_content = PDFExtractor._extract_page_content(page, page_num + 1)
+            for page_content in PDFExtractor._iter_page_contents(doc, include_tables):
                 pages.append(page_content)
                 all_text.append(page_content['text'])
 
@@ -70,6 +65,101 @@ class PDFExtractor:
             logger.error(f"Error extracting PDF content: {str(e)}", exc_info=True)
             raise ValueError(f"Failed to extract PDF content: {str(e)}")
 
+    @staticmethod
+    def iter_pages(pdf_path: str, include_tables: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Extract the pages of a PDF file one at a time.
+
+        Unlike extract_from_file, only the page being processed is held in memory,
+        so callers can write out each page before the next one is parsed.
+
+        Args:
+            pdf_path: Path to the PDF file
+            include_tables: Whether to detect tables; when False, every page has no tables
+
+        Yields:
+            Page contents with text and tables, in page order
+
+        Raises:
+            FileNotFoundError: If the PDF file doesn't exist
+            ValueError: If the file is not a valid PDF
+        """
+        PDFExtractor._validate_path(pdf_path)
+
+        logger.info(f"Streaming content from PDF: {pdf_path}")
+
+        try:
+            with fitz.open(pdf_path) as doc:
+                yield from PDFExtractor._iter_page_contents(doc, include_tables)
+
+        except Exception as e:
+            logger.error(f"Error extracting PDF content: {str(e)}", exc_info=True)
+            raise ValueError(f"Failed to extract PDF content: {str(e)}")
+
+    @staticmethod
+    def get_document_info(pdf_path: str) -> Dict[str, Any]:
+        """
+        Read the metadata and page count of a PDF file without extracting pages.
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Returns:
+            Dictionary containing:
+                - metadata: PDF metadata (title, author, etc.)
+                - num_pages: Number of pages
+
+        Raises:
+            FileNotFoundError: If the PDF file doesn't exist
+            ValueError: If the file is not a valid PDF
+        """
+        PDFExtractor._validate_path(pdf_path)
+
+        try:
+            with fitz.open(pdf_path) as doc:
+                return {
+                    'metadata': PDFExtractor._extract_metadata(doc),
+                    'num_pages': len(doc)
+                }
+
+        except Exception as e:
+            logger.error(f"Error reading PDF metadata: {str(e)}", exc_info=True)
+            raise ValueError(f"Failed to read PDF metadata: {str(e)}")
+
+    @staticmethod
+    def _validate_path(pdf_path: str) -> None:
+        """
+        Check that a path points to an existing PDF file.
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Raises:
+            FileNotFoundError: If the PDF file doesn't exist
+            ValueError: If the file is not a PDF
+        """
+        pdf_file = Path(pdf_path)
+        if not pdf_file.exists():
+            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+
+        if not pdf_file.suffix.lower() == '.pdf':
+            raise ValueError(f"File must be a PDF: {pdf_path}")
+
+    @staticmethod
+    def _iter_page_contents(doc: fitz.Document, include_tables: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Extract the content of each page of an open document.
+
+        Args:
+            doc: PyMuPDF document object
+            include_tables: Whether to detect tables on each page
+
+        Yields:
+            Page contents, in page order
+        """
+        for page_num in range(len(doc)):
+            yield PDFExtractor._extract_page_content(doc[page_num], page_num + 1, include_tables)
+
     @staticmethod
     def _extract_metadata(doc: fitz.Document) -> Dict[str, Any]:
         """
@@ -94,13 +184,14 @@ class PDFExtractor:
         }
 
     @staticmethod
-    def _extract_page_content(page: fitz.Page, page_num: int) -> Dict[str, Any]:
+    def _extract_page_content(page: fitz.Page, page_num: int, include_tables: bool = True) -> Dict[str, Any]:
         """
         Extract content from a single PDF page including text and tables.
 
         Args:
             page: PyMuPDF page object
             page_num: Page number (1-indexed)
+            include_tables: Whether to detect tables; table detection is the costly part
 
         Returns:
             Dictionary containing page content
@@ -109,7 +200,7 @@ class PDFExtractor:
         text = page.get_text("text")
 
         # Try to extract tables
-        tables = PDFExtractor._extract_tables(page)
+        tables = PDFExtractor._extract_tables(page) if include_tables else []
 
         # Get page dimensions
         rect = page.rect
@@ -180,44 +271,21 @@ class PDFExtractor:
         Returns:
             Markdown formatted table string
         """
-        if not table_data or len(table_data) == 0:
+        if not table_data:
             return ""
 
-        # Clean up cell data
-        cleaned_data = []
-        for row in table_data:
-            cleaned_row = [str(cell).strip() if cell else "" for cell in row]
-            cleaned_data.append(cleaned_row)
-
-        # Determine column widths for alignment
-        num_cols = len(cleaned_data[0]) if cleaned_data else 0
-        col_widths = [0] * num_cols
-
-        for row in cleaned_data:
-            for i, cell in enumerate(row):
-                if i < num_cols:
-                    col_widths[i] = max(col_widths[i], len(cell))
-
-        # Build markdown table
-        markdown_lines = []
-
-        # Header row (first row)
-        if cleaned_data:
-            header = cleaned_data[0]
-            header_line = "| " + " | ".join(cell.ljust(col_widths[i]) for i, cell in enumerate(header)) + " |"
-            markdown_lines.append(header_line)
-
-            # Separator line
-            separator = "| " + " | ".join("-" * col_widths[i] for i in range(num_cols)) + " |"
-            markdown_lines.append(separator)
-
-            # Data rows
-            for row in cleaned_data[1:]:
-                row_line = "| " + " | ".join(
-                    cell.ljust(col_widths[i]) if i < len(row) else " " * col_widths[i]
-                    for i, cell in enumerate(row)
-                ) + " |"
-                markdown_lines.append(row_line)
+        # Clean up cell data and pad short rows to the widest row. Cells are not padded
+        # to a common width: markdown renderers ignore it, and it only adds whitespace.
+        rows = [["" if cell is None else str(cell).strip() for cell in row] for row in table_data]
+        num_cols = max(map(len, rows))
+
+        markdown_lines = [
+            "| " + " | ".join(row + [""] * (num_cols - len(row))) + " |"
+            for row in rows
+        ]
+
+        # Separator line after the header row (first row)
+        markdown_lines.insert(1, "| " + " | ".join(["---"] * num_cols) + " |")
 
         return "\n".join(markdown_lines)
 
@@ -236,8 +304,9 @@ class PDFExtractor:
             FileNotFoundError: If the PDF file doesn't exist
             ValueError: If the file is not a valid PDF
         """
-        result = PDFExtractor.extract_from_file(pdf_path)
-        return result['text']
+        # Stream the pages so only their text is kept, and skip table detection
+        pages = PDFExtractor.iter_pages(pdf_path, include_tables=False)
+        return '\n\n'.join(page['text'] for page in pages)
 
     @staticmethod
     def extract_with_markdown_tables(pdf_path: str) -> str:
@@ -254,21 +323,22 @@ class PDFExtractor:
             FileNotFoundError: If the PDF file doesn't exist
             ValueError: If the file is not a valid PDF
         """
-        result = PDFExtractor.extract_from_file(pdf_path)
+        content = io.StringIO()
+        # Sections are separated by a newline; none goes before the first one
+        separator = ""
 
-        content_parts = []
-
-        for page in result['pages']:
+        for page in PDFExtractor.iter_pages(pdf_path):
             # Add page text
             if page['text']:
-                content_parts.append(f"## Page {page['page_number']}\n")
-                content_parts.append(page['text'])
+                content.write(f"{separator}## Page {page['page_number']}\n\n{page['text']}")
+                separator = "\n"
 
             # Add tables in markdown format
-            if page['tables']:
-                for table in page['tables']:
-                    content_parts.append(f"\n### Table {table['table_index'] + 1} on Page {page['page_number']}\n")
-                    content_parts.append(table['markdown'])
-                    content_parts.append("\n")
-
-        return "\n".join(content_parts)
+            for table in page['tables']:
+                content.write(
+                    f"{separator}\n### Table {table['table_index'] + 1} on Page {page['page_number']}\n\n"
+                    f"{table['markdown']}\n\n"
+                )
+                separator = "\n"
+
+        return content.getvalue()
@@ -1,3 +1,538 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from ally.ai.agents.competitor_report.tools import lookup_competitors, lookup_product
+from ally.management.commands.finalize_product import Command as FinalizeProductCommand
+from ally.management.commands.generate_competitor_data import Command as GenerateCompetitorDataCommand
+from ally.product_service import Product, ProductService, _LazyService, product_service
+from ally.services.file_cache import FileBackedCache
+from ally.views import _inflight_runs, _single_flight
+
+
+class FileBackedCacheTests(SimpleTestCase):
+    """Tests for the disk-backed document cache shared by the document services."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.directory = self._tmp_dir.name
+
+    def make_cache(self, **kwargs):
+        return FileBackedCache(self.directory, 'doc_', 'document', **kwargs)
+
+    def test_save_and_get_round_trip(self):
+        cache = self.make_cache()
+        content = '# Café report\n\nNaïve “quotes” and emoji 🚀'
+        cache.save('P1', content)
+
+        self.assertEqual(cache.get('P1'), content)
+        with open(os.path.join(self.directory, 'doc_P1.md'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), content)
+
+        # Served from disk once the memory cache is cleared
+        cache.clear_cache()
+        self.assertEqual(cache.get('P1'), content)
+
+    def test_get_missing_and_empty_ids(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.get('missing'))
+        self.assertIsNone(cache.get(''))
+
+    def test_save_rejects_empty_values(self):
+        cache = self.make_cache()
+        with self.assertRaises(ValueError):
+            cache.save('', 'content')
+        with self.assertRaises(ValueError):
+            cache.save('P1', '')
+
+    def test_lru_eviction_by_count(self):
+        cache = self.make_cache(maxsize=2)
+        cache.save('P1', 'one')
+        cache.save('P2', 'two')
+        cache.get('P1')  # P2 is now the least recently used
+        cache.save('P3', 'three')
+
+        self.assertEqual(list(cache._cache), ['P1', 'P3'])
+        # Evicted documents are still on disk
+        self.assertEqual(cache.get('P2'), 'two')
+
+    def test_eviction_by_size_prefers_large_documents(self):
+        cache = self.make_cache(max_bytes=250, large_document_size=100)
+        cache.save('small', 'a' * 50)
+        cache.save('large', 'b' * 150)
+        cache.save('new', 'c' * 60)
+
+        # The large document goes first, even though the small one is older
+        self.assertEqual(list(cache._cache), ['small', 'new'])
+        self.assertEqual(cache._cache_bytes, 110)
+
+    def test_byte_count_uses_encoded_size(self):
+        cache = self.make_cache()
+        cache.save('P1', 'é' * 10)
+        cache.save('P2', 'plain')
+        self.assertEqual(cache._cache_bytes, 25)
+
+        cache.save('P1', 'x')
+        cache.delete('P2')
+        self.assertEqual(cache._cache_bytes, 1)
+
+    def test_has_rescans_disk_after_ttl(self):
+        cache = self.make_cache(disk_ids_ttl=60)
+        self.assertFalse(cache.has('P1'))
+
+        # Written by another process, invisible until the disk IDs expire
+        with open(os.path.join(self.directory, 'doc_P1.md'), 'w', encoding='utf-8') as f:
+            f.write('external')
+        self.assertFalse(cache.has('P1'))
+
+        with mock.patch('ally.services.file_cache.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertTrue(cache.has('P1'))
+
+    def test_has_tracks_own_saves_and_deletes(self):
+        cache = self.make_cache(disk_ids_ttl=60)
+        self.assertFalse(cache.has('P1'))
+
+        cache.save('P1', 'content')
+        cache.clear_cache()
+        self.assertTrue(cache.has('P1'))
+
+        self.assertTrue(cache.delete('P1'))
+        self.assertFalse(cache.has('P1'))
+        self.assertFalse(cache.delete('P1'))
+
+    def test_has_keeps_saves_made_during_rescan(self):
+        cache = self.make_cache(disk_ids_ttl=60)
+        list_ids = cache.list_ids
+
+        def list_ids_then_save():
+            # The directory was scanned just before another thread saved P1
+            product_ids = list_ids()
+            cache.save('P1', 'content')
+            return product_ids
+
+        with mock.patch.object(cache, 'list_ids', side_effect=list_ids_then_save):
+            self.assertTrue(cache.has('P1'))
+
+        cache.clear_cache()
+        self.assertTrue(cache.has('P1'))
+
+    def test_failed_save_keeps_previous_file(self):
+        cache = self.make_cache()
+        cache.save('P1', 'original')
+
+        with mock.patch('ally.services.file_cache.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(IOError):
+                cache.save('P1', 'updated')
+
+        with open(os.path.join(self.directory, 'doc_P1.md'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'original')
+        # The temporary file is cleaned up
+        self.assertEqual(os.listdir(self.directory), ['doc_P1.md'])
+
+    def test_list_ids_ignores_other_files(self):
+        cache = self.make_cache()
+        cache.save('P1', 'one')
+        cache.save('P2', 'two')
+        for name in ('other_P3.md', 'doc_P4.txt', 'doc_P5.md.tmp.123'):
+            with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as f:
+                f.write('ignored')
+
+        self.assertEqual(sorted(cache.list_ids()), ['P1', 'P2'])
+
+    def test_warm_cache_loads_newest_documents(self):
+        writer = self.make_cache()
+        for index, product_id in enumerate(['old', 'mid', 'new']):
+            writer.save(product_id, product_id)
+            path = os.path.join(self.directory, f'doc_{product_id}.md')
+            os.utime(path, (1_000_000 + index, 1_000_000 + index))
+
+        cache = self.make_cache()
+        self.assertEqual(cache.warm_cache(max_files=2), 2)
+        # The newest document ends up most recently used
+        self.assertEqual(list(cache._cache), ['mid', 'new'])
+
+
+class SummaryViewTests(SimpleTestCase):
+    """Tests for the cached, conditional summary page."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.product_id = product_service.get_all_products()[0].product_id
+        self.url = f'/summary/{self.product_id}/'
+
+        # Summarization as another process would see it on disk
+        self.summarization = 'First summary'
+        patcher = mock.patch(
+            'ally.views.summarization_service.get_summarization',
+            side_effect=lambda product_id: self.summarization,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_etag_and_body_follow_summarization_changed_behind_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(b'First summary', first.content)
+
+        # Changed without going through finalize_product_view, so no cache is cleared
+        self.summarization = 'Second summary'
+
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(b'Second summary', second.content)
+        self.assertNotIn(b'First summary', second.content)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+        # The new ETag validates the new body
+        third = self.client.get(self.url, HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(third.status_code, 304)
+
+    def test_etag_matches_cached_body(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertEqual(first.content, second.content)
+
+
+class RecommendationsViewTests(SimpleTestCase):
+    """Tests for the conditional recommendations page."""
+
+    def setUp(self):
+        self.product_id = product_service.get_all_products()[0].product_id
+        self.url = f'/recommendations/{self.product_id}/'
+
+        # Documents as another process would see them on disk
+        self.report = 'First report'
+        self.recommendations = 'First recommendations'
+        for target, attribute in (
+            ('ally.views.competitor_report_service.get_report', 'report'),
+            ('ally.views.product_recommendation_service.get_recommendations', 'recommendations'),
+        ):
+            patcher = mock.patch(
+                target,
+                side_effect=lambda product_id, attribute=attribute: getattr(self, attribute),
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_etag_and_body_follow_recommendations_changed_behind_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(b'First recommendations', first.content)
+
+        # Changed by another process, without touching this one
+        self.recommendations = 'Second recommendations'
+
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(b'Second recommendations', second.content)
+        self.assertNotIn(b'First recommendations', second.content)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+        # The new ETag validates the new body
+        third = self.client.get(self.url, HTTP_IF_NONE_MATCH=second['ETag'])
+        self.assertEqual(third.status_code, 304)
+
+    def test_etag_matches_body_read(self):
+        # The documents change between the conditional GET check and the render
+        reads = iter(['Old recommendations', 'New recommendations'])
+        with mock.patch(
+            'ally.views.product_recommendation_service.get_recommendations',
+            side_effect=lambda product_id: next(reads),
+        ):
+            response = self.client.get(self.url)
+
+        self.assertIn(b'New recommendations', response.content)
+        self.recommendations = 'New recommendations'
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+
+class CompetitorReportToolsTests(SimpleTestCase):
+    """Tests for the product lookups the competitor report agent calls."""
+
+    def setUp(self):
+        self.product = Product(
+            product_id='P1',
+            title='Widget',
+            image_url=['https://example.com/a.jpg'],
+            bullet_points=['Sturdy', 'Light'],
+            avg_rank_search=3.0,
+            description_filled='A widget',
+        )
+        self.competitor = Product(product_id='C1', title='Gadget', source_product_id='P1')
+
+    def _patch_lookups(self):
+        # Replace the services the tools module refers to, so the shared catalogs are
+        # neither loaded nor patched
+        tools = 'ally.ai.agents.competitor_report.tools'
+        product_patcher = mock.patch(f'{tools}.product_service')
+        competitors_patcher = mock.patch(f'{tools}.competitor_service')
+        product_patcher.start().get_product_by_id.return_value = self.product
+        competitors_patcher.start().get_competitors_for_product.return_value = [self.product, self.competitor]
+        self.addCleanup(product_patcher.stop)
+        self.addCleanup(competitors_patcher.stop)
+
+    def test_agent_sees_model_dump_json_shape(self):
+        self._patch_lookups()
+        metrics = {
+            'title_length': 6,
+            'num_bullet_points': 2,
+            'avg_bullet_length': 5.5,
+            'total_bullet_chars': 11,
+            'description_length': 8,
+        }
+
+        self.assertEqual(
+            json.dumps(lookup_product('P1')),
+            json.dumps({**self.product.model_dump(), **metrics}),
+        )
+
+        competitors = lookup_competitors('P1')['competitors']
+        self.assertEqual(json.dumps(competitors[0]), json.dumps({**self.product.model_dump(), **metrics}))
+        self.assertEqual(competitors[1]['bullet_points'], self.competitor.model_dump()['bullet_points'])
+        self.assertEqual(list(competitors[1])[:len(Product.model_fields)], list(Product.model_fields))
+
+    def test_changing_result_leaves_catalog_product_unchanged(self):
+        self._patch_lookups()
+
+        product_dict = lookup_product('P1')
+        product_dict['bullet_points'].append('Cheap')
+        product_dict['image_url'].clear()
+        competitor_dict = lookup_competitors('P1')['competitors'][0]
+        competitor_dict['bullet_points'].clear()
+
+        self.assertEqual(self.product.bullet_points, ['Sturdy', 'Light'])
+        self.assertEqual(self.product.image_url, ['https://example.com/a.jpg'])
+
+
+class LazyServiceTests(SimpleTestCase):
+    """Tests for the proxy that creates a service on first use."""
+
+    def test_creates_service_once_on_first_use(self):
+        factory = mock.Mock(return_value=mock.Mock(name='service'))
+        proxy = _LazyService(factory)
+        factory.assert_not_called()
+
+        proxy.load()
+        proxy.load()
+        factory.assert_called_once_with()
+
+    def test_patching_the_proxy_can_be_undone(self):
+        class Service:
+            def lookup(self):
+                return 'real'
+
+        service = Service()
+        proxy = _LazyService(lambda: service)
+
+        with mock.patch.object(proxy, 'lookup', return_value='mocked'):
+            self.assertEqual(proxy.lookup(), 'mocked')
+            self.assertEqual(service.lookup(), 'mocked')
+
+        self.assertEqual(proxy.lookup(), 'real')
+        self.assertNotIn('lookup', vars(service))
+
+
+class GenerateCompetitorDataCacheTests(SimpleTestCase):
+    """Tests for the --cache option of generate_competitor_data."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+
+        self.command = GenerateCompetitorDataCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        self.command.delay = 0
+        self.command.num_retries = 0
+        self.command.cache_dir = Path(self._tmp_dir.name)
+        self.product = Product(product_id='P1', title='Widget')
+
+    def _generate(self, response_text):
+        response = mock.Mock(choices=[mock.Mock(message=mock.Mock(content=response_text))])
+        with mock.patch(
+            'ally.management.commands.generate_competitor_data.acompletion',
+            new=mock.AsyncMock(return_value=response),
+        ) as acompletion:
+            competitors = asyncio.run(self.command.generate_competitors(self.product, 1))
+        return competitors, acompletion
+
+    def test_malformed_response_is_not_cached(self):
+        competitors, _ = self._generate('Sorry, I cannot help with that')
+        self.assertEqual(competitors, [])
+        self.assertEqual(os.listdir(self._tmp_dir.name), [])
+
+        # The next run asks the API again
+        _, acompletion = self._generate('```json\n[{"product_id": "C1", "title": "Gadget"}]\n```')
+        acompletion.assert_awaited_once()
+
+    def test_parsed_response_is_cached_and_replayed(self):
+        competitors, _ = self._generate('[{"product_id": "C1", "title": "Gadget"}]')
+        self.assertEqual([c.product_id for c in competitors], ['C1'])
+        self.assertEqual(len(os.listdir(self._tmp_dir.name)), 1)
+
+        competitors, acompletion = self._generate('not used')
+        acompletion.assert_not_awaited()
+        self.assertEqual([c.product_id for c in competitors], ['C1'])
+
+
+class FinalizeProductCommandTests(SimpleTestCase):
+    """Tests for finalizing several products at once."""
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        settings_override = override_settings(BASE_DIR=self._tmp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.command = FinalizeProductCommand(stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_failed_summary_write_leaves_other_runs_going(self):
+        async def run_final_agent(product_id, user_id, timeout_seconds):
+            if product_id == 'P1':
+                return None
+            # Still running when the first summary fails to write
+            await asyncio.sleep(0.01)
+            return f'Summary of {product_id}'
+
+        with mock.patch(
+            'ally.management.commands.finalize_product.AgentService.run_final_agent',
+            side_effect=run_final_agent,
+        ):
+            failed = asyncio.run(self.command._finalize_products(['P1', 'P2'], 'user', 60, 2, None))
+
+        self.assertEqual(failed, ['P1'])
+        summary_dir = os.path.join(self._tmp_dir.name, 'summarization')
+        self.assertEqual(os.listdir(summary_dir), ['summarization_P2.md'])
+        with open(os.path.join(summary_dir, 'summarization_P2.md'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'Summary of P2')
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Tests for coalescing concurrent agent runs with the same key."""
+
+    def test_concurrent_callers_share_one_run(self):
+        run = mock.AsyncMock(return_value='report')
+
+        async def call_twice():
+            async def slow_run():
+                await asyncio.sleep(0.01)
+                return await run()
+
+            return await asyncio.gather(
+                _single_flight(('report', 'P1'), slow_run),
+                _single_flight(('report', 'P1'), slow_run),
+            )
+
+        self.assertEqual(asyncio.run(call_twice()), ['report', 'report'])
+        run.assert_awaited_once()
+        self.assertNotIn(('report', 'P1'), _inflight_runs)
+
+    def test_every_caller_receives_the_run_error(self):
+        calls = 0
+
+        async def failing_run():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise TimeoutError('agent timed out')
+
+        async def call_twice():
+            return await asyncio.gather(
+                _single_flight(('report', 'P1'), failing_run),
+                _single_flight(('report', 'P1'), failing_run),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(call_twice())
+        self.assertEqual(calls, 1)
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertIsInstance(result, TimeoutError)
+            self.assertEqual(str(result), 'agent timed out')
+        self.assertNotIn(('report', 'P1'), _inflight_runs)
+
+    def test_cancelled_leader_fails_the_followers(self):
+        async def call_and_cancel_leader():
+            leader = asyncio.create_task(_single_flight(('report', 'P1'), lambda: asyncio.sleep(1)))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(_single_flight(('report', 'P1'), mock.AsyncMock()))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await asyncio.gather(leader, follower, return_exceptions=True)
+
+        leader_result, follower_result = asyncio.run(call_and_cancel_leader())
+        self.assertIsInstance(leader_result, asyncio.CancelledError)
+        self.assertIsInstance(follower_result, RuntimeError)
+        self.assertNotIn(('report', 'P1'), _inflight_runs)
+
+    def test_later_call_starts_a_new_run(self):
+        run = mock.AsyncMock(side_effect=['first', 'second'])
+
+        self.assertEqual(asyncio.run(_single_flight(('report', 'P1'), run)), 'first')
+        self.assertEqual(asyncio.run(_single_flight(('report', 'P1'), run)), 'second')
+        self.assertEqual(run.await_count, 2)
+
+
+class ProductServiceBatchUpdatesTests(SimpleTestCase):
+    """Tests for deferring product saves with batch_updates()."""
+
+    def setUp(self):
+        self.service = ProductService(os.path.join(tempfile.gettempdir(), 'missing_products.csv'))
+        patcher = mock.patch.object(self.service, 'save_to_csv')
+        self.save_to_csv = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_saves_once_when_the_batch_ends(self):
+        with self.service.batch_updates():
+            self.service.save()
+            with self.service.batch_updates():
+                self.service.save()
+            # The nested batch joins the outer one
+            self.save_to_csv.assert_not_called()
+
+        self.save_to_csv.assert_called_once_with(self.service.csv_file_path)
+
+    def test_saves_when_the_batch_raises(self):
+        with self.assertRaises(RuntimeError):
+            with self.service.batch_updates():
+                self.service.save()
+                raise RuntimeError('agent failed')
+
+        self.save_to_csv.assert_called_once()
+
+    def test_batch_without_changes_does_not_save(self):
+        with self.service.batch_updates():
+            pass
+        self.save_to_csv.assert_not_called()
+
+    def test_concurrent_batches_save_independently(self):
+        async def run_batches():
+            release = asyncio.Event()
+
+            async def first():
+                with self.service.batch_updates():
+                    self.service.save()
+                    await release.wait()
+
+            async def second():
+                with self.service.batch_updates():
+                    self.service.save()
+                # Written without waiting for the first batch to close
+                self.save_to_csv.assert_called_once()
+                release.set()
+
+            await asyncio.gather(first(), second())
+
+        asyncio.run(run_batches())
+        self.assertEqual(self.save_to_csv.call_count, 2)
@@ -1,33 +1,219 @@
 import asyncio
+import hashlib
+import json
 import logging
+import threading
+from concurrent.futures import Future
+from functools import wraps
 
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
 from django.shortcuts import render, get_object_or_404
-from django.http import Http404, JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.http import Http404, HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.utils.http import quote_etag
+from django.views.decorators.http import etag, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from ally.product_service import product_service
 from ally.services.agent_service import AgentService
 from ally.services.competitor_report_service import competitor_report_service
 from ally.services.product_recommendation_service import product_recommendation_service
+from ally.services.summarization_service import summarization_service
 
 logger = logging.getLogger(__name__)
 
+# The generate-report body only carries a force_regeneration flag
+MAX_GENERATE_REPORT_BODY_SIZE = 1024
+
+# Rendered products list, which only changes when a product is finalized. Finalizing
+# deletes it; the timeout bounds staleness across processes.
+PRODUCTS_LIST_CACHE_KEY = 'products_list_html'
+PRODUCTS_LIST_CACHE_TIMEOUT = 60
+SUMMARY_CACHE_TIMEOUT = 300
+
+
+def _summary_cache_key(product_id: str, page_etag: str) -> str:
+    """
+    Return the cache key of a product's rendered summary page.
+
+    The key includes the page's ETag, so a changed product or summarization is never
+    served from an entry rendered for older data, whichever process changed it.
+    """
+    return f'summary_html:{product_id}:{page_etag}'
+
+
+def _page_etag(product, *documents) -> str:
+    """
+    Compute the ETag of a product page from the data it is rendered from.
+
+    Args:
+        product: The product shown on the page
+        *documents: The markdown documents shown on the page, None for missing ones
+
+    Returns:
+        A hex digest that changes whenever the product or any document changes
+    """
+    digest = hashlib.md5(product.model_dump_json().encode('utf-8'), usedforsecurity=False)
+    for document in documents:
+        # Separate the documents so moving text between them changes the digest
+        digest.update(b'\0')
+        if document is not None:
+            digest.update(document.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _recommendations_etag(request, product_id):
+    """Return the ETag of the recommendations page."""
+    return _page_etag(
+        request.product,
+        competitor_report_service.get_report(product_id),
+        product_recommendation_service.get_recommendations(product_id),
+    )
+
+
+def _summary_etag(request, product_id):
+    """Return the ETag of the summary page."""
+    return _page_etag(request.product, summarization_service.get_summarization(product_id))
+
+
+# Whether this process has started preloading the saved documents
+_documents_warming_started = False
+_documents_warming_lock = threading.Lock()
+
+
+def _start_warming_documents() -> None:
+    """
+    Preload the saved documents into memory in the background, once per process.
+
+    Runs on the first products list request rather than at app load, so management
+    commands and other processes that never serve pages do not read the documents.
+    The list page does not wait for it; the product pages opened from it are then
+    served from memory.
+    """
+    global _documents_warming_started
+    with _documents_warming_lock:
+        if _documents_warming_started:
+            return
+        _documents_warming_started = True
+
+    def warm():
+        for service in (competitor_report_service, product_recommendation_service, summarization_service):
+            service.warm_cache()
+
+    threading.Thread(target=warm, name='warm-document-caches', daemon=True).start()
+
+
+# Agent runs in progress, keyed by (agent, product_id). Concurrent requests for the same
+# run wait for the first one instead of starting their own. The futures are thread-safe,
+# so this also works under WSGI, where each request runs its own event loop.
+_inflight_runs: dict[tuple[str, str], Future] = {}
+_inflight_runs_lock = threading.Lock()
+
+
+def _product_not_found(product_id: str) -> JsonResponse:
+    """Return the JSON error response for an unknown product ID."""
+    return JsonResponse({
+        'status': 'error',
+        'message': f'Product {product_id} not found'
+    }, status=404)
+
+
+def require_product(view):
+    """
+    Look up the product named by the view's product_id and attach it as request.product.
+
+    Page views raise Http404 for an unknown product, API (async) views return a JSON
+    404 response instead.
+
+    Args:
+        view: The view function, sync or async, taking a product_id argument
+
+    Returns:
+        The wrapped view
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, product_id, *args, **kwargs):
+            # The first lookup may load the catalog
+            product = await sync_to_async(product_service.get_product_by_id, thread_sensitive=False)(product_id)
+            if not product:
+                return _product_not_found(product_id)
+            request.product = product
+            return await view(request, product_id, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, product_id, *args, **kwargs):
+        product = product_service.get_product_by_id(product_id)
+        if not product:
+            raise Http404("Product not found")
+        request.product = product
+        return view(request, product_id, *args, **kwargs)
+
+    return wrapper
+
+
+async def _single_flight(key: tuple[str, str], run):
+    """
+    Run an agent once for all concurrent callers with the same key.
+
+    Args:
+        key: Identifies the run, e.g. ('report', product_id)
+        run: Zero-argument callable returning the coroutine to run
+
+    Returns:
+        The result of the run, shared by every caller that joined it
+
+    Raises:
+        Exception: Whatever the run raised, re-raised for every caller
+    """
+    with _inflight_runs_lock:
+        future = _inflight_runs.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            future.set_running_or_notify_cancel()
+            _inflight_runs[key] = future
+
+    if not is_leader:
+        logger.info(f'Waiting for the {key[0]} run already in progress for product: {key[1]}')
+        return await asyncio.wrap_future(future)
+
+    try:
+        result = await run()
+    except asyncio.CancelledError:
+        future.set_exception(RuntimeError(f'The {key[0]} run for product {key[1]} was cancelled'))
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_runs_lock:
+            del _inflight_runs[key]
+
 
 def products_list(request):
     """View to display all products from the ProductService."""
-    products = product_service.get_all_products()
-    context = {
-        'products': products
-    }
-    return render(request, 'ally/products.html', context)
+    _start_warming_documents()
 
+    def render_page():
+        context = {
+            'products': product_service.get_all_products()
+        }
+        return render_to_string('ally/products.html', context)
 
+    html = cache.get_or_set(PRODUCTS_LIST_CACHE_KEY, render_page, PRODUCTS_LIST_CACHE_TIMEOUT)
+    return HttpResponse(html)
+
+
+@require_product
+@etag(_recommendations_etag)
 def recommendations(request, product_id):
     """View to display competitive analysis and recommendations for a product."""
-    product = product_service.get_product_by_id(product_id)
-    if not product:
-        raise Http404("Product not found")
-
     # Get the report from the CompetitorReportService
     report = competitor_report_service.get_report(product_id)
 
@@ -35,16 +221,64 @@ def recommendations(request, product_id):
     recommendations = product_recommendation_service.get_recommendations(product_id)
 
     context = {
-        'product': product,
+        'product': request.product,
         'competitor_report': report,
         'product_recommendations': recommendations
     }
-    return render(request, 'ally/recommendations.html', context)
+    response = render(request, 'ally/recommendations.html', context)
+    # The body and its ETag both come from these reads, even if a document changed
+    # since the conditional GET check
+    response['ETag'] = quote_etag(_page_etag(request.product, report, recommendations))
+    return response
+
+
+async def _generate_report_and_recommendations(
+    product_id: str,
+    user_id: str,
+    generate_report: bool,
+    generate_recommendations: bool
+):
+    """
+    Run the competitor report and recommendations agents for a product.
+
+    The recommendations agent reads the saved competitor report when it starts, so a
+    new report is generated first rather than concurrently.
+
+    Args:
+        product_id: The product ID
+        user_id: The user ID for the agent sessions
+        generate_report: Whether to generate a new competitor report
+        generate_recommendations: Whether to generate new recommendations
+
+    Returns:
+        Tuple of the new report and recommendations, None for the ones not generated
+    """
+    report = None
+    recommendations = None
+
+    if generate_report:
+        report = await _single_flight(('report', product_id), lambda: AgentService.run_competitor_report(
+            product_id=product_id,
+            user_id=user_id,
+            timeout_seconds=300  # 5 minutes
+        ))
+        logger.info(f'Successfully generated new competitor report for product: {product_id}')
+
+    if generate_recommendations:
+        recommendations = await _single_flight(('recommendations', product_id), lambda: AgentService.run_recommendations(
+            product_id=product_id,
+            user_id=user_id,
+            timeout_seconds=300  # 5 minutes
+        ))
+        logger.info(f'Successfully generated new recommendations for product: {product_id}')
+
+    return report, recommendations
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def generate_competitor_report_view(request, product_id):
+@require_product
+async def generate_competitor_report_view(request, product_id):
     """
     API endpoint to generate a competitor report and recommendations for a product.
 
@@ -52,67 +286,59 @@ def generate_competitor_report_view(request, product_id):
         request: The HTTP request
         product_id: The product ID
     """
-    # Get force_regeneration from request body if present
-    import json
-    force_regeneration = False
-    try:
-        if request.body:
-            body = json.loads(request.body)
-            force_regeneration = body.get('force_regeneration', False)
-    except json.JSONDecodeError:
+    # Get force_regeneration from the query string, or from the request body if present
+    if 'force_regeneration' in request.GET:
+        force_regeneration = request.GET['force_regeneration'].lower() in ('1', 'true', 'yes')
+    else:
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > MAX_GENERATE_REPORT_BODY_SIZE:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Request body too large'
+            }, status=413)
+
         force_regeneration = False
+        try:
+            if request.body:
+                body = json.loads(request.body)
+                if isinstance(body, dict):
+                    force_regeneration = bool(body.get('force_regeneration', False))
+        except ValueError:
+            force_regeneration = False
 
     logger.info(f'Received request to generate competitor report for product: {product_id} (force_regeneration={force_regeneration})')
 
-    # Verify the product exists
-    product = product_service.get_product_by_id(product_id)
-    if not product:
-        return JsonResponse({
-            'status': 'error',
-            'message': f'Product {product_id} not found'
-        }, status=404)
-
     try:
         report = None
         recommendations = None
-        report_generated = False
-        recommendations_generated = False
 
         # Check if we should use cached values
         if not force_regeneration:
-            # Try to get existing report
-            report = competitor_report_service.get_report(product_id)
+            # Try to get the existing report and recommendations, both at once
+            report, recommendations = await asyncio.gather(
+                sync_to_async(competitor_report_service.get_report, thread_sensitive=False)(product_id),
+                sync_to_async(product_recommendation_service.get_recommendations, thread_sensitive=False)(product_id),
+            )
             if report:
                 logger.info(f'Using cached competitor report for product: {product_id}')
-
-            # Try to get existing recommendations
-            recommendations = product_recommendation_service.get_recommendations(product_id)
             if recommendations:
                 logger.info(f'Using cached recommendations for product: {product_id}')
 
-        # Generate competitor report if needed
-        if force_regeneration or not report:
-            report = asyncio.run(
-                AgentService.run_competitor_report(
-                    product_id=product_id,
-                    user_id=request.session.session_key or 'anonymous',
-                    timeout_seconds=300  # 5 minutes
-                )
-            )
-            report_generated = True
-            logger.info(f'Successfully generated new competitor report for product: {product_id}')
-
-        # Generate recommendations if needed
-        if force_regeneration or not recommendations:
-            recommendations = asyncio.run(
-                AgentService.run_recommendations(
-                    product_id=product_id,
-                    user_id=request.session.session_key or 'anonymous',
-                    timeout_seconds=300  # 5 minutes
-                )
+        # Generate whatever is missing
+        report_generated = force_regeneration or not report
+        recommendations_generated = force_regeneration or not recommendations
+        if report_generated or recommendations_generated:
+            new_report, new_recommendations = await _generate_report_and_recommendations(
+                product_id,
+                user_id=request.session.session_key or 'anonymous',
+                generate_report=report_generated,
+                generate_recommendations=recommendations_generated,
             )
-            recommendations_generated = True
-            logger.info(f'Successfully generated new recommendations for product: {product_id}')
+            report = new_report or report
+            recommendations = new_recommendations or recommendations
 
         # Prepare status message
         if report_generated and recommendations_generated:
@@ -135,6 +361,13 @@ def generate_competitor_report_view(request, product_id):
             }
         })
 
+    except TimeoutError as e:
+        logger.error(f'Timed out generating competitor report: {str(e)}')
+        return JsonResponse({
+            'status': 'error',
+            'message': f'Report generation timed out: {str(e)}'
+        }, status=504)
+
     except Exception as e:
         logger.error(f'Error generating competitor report: {str(e)}', exc_info=True)
         return JsonResponse({
@@ -145,27 +378,19 @@ def generate_competitor_report_view(request, product_id):
 
 @csrf_exempt
 @require_http_methods(["POST"])
-def finalize_product_view(request, product_id):
+@require_product
+async def finalize_product_view(request, product_id):
     """API endpoint to finalize product by applying recommendations."""
     logger.info(f'Received request to finalize product: {product_id}')
 
-    # Verify the product exists
-    product = product_service.get_product_by_id(product_id)
-    if not product:
-        return JsonResponse({
-            'status': 'error',
-            'message': f'Product {product_id} not found'
-        }, status=404)
-
     try:
         # Run the final agent (which will apply recommendations and create summary)
-        summary = asyncio.run(
-            AgentService.run_final_agent(
-                product_id=product_id,
-                user_id=request.session.session_key or 'anonymous',
-                timeout_seconds=600  # 10 minutes
-            )
-        )
+        user_id = request.session.session_key or 'anonymous'
+        summary = await _single_flight(('final', product_id), lambda: AgentService.run_final_agent(
+            product_id=product_id,
+            user_id=user_id,
+            timeout_seconds=600  # 10 minutes
+        ))
 
         logger.info(f'Successfully finalized product: {product_id}')
 
@@ -175,6 +400,13 @@ def finalize_product_view(request, product_id):
             'summary': summary
         })
 
+    except TimeoutError as e:
+        logger.error(f'Timed out finalizing product: {str(e)}')
+        return JsonResponse({
+            'status': 'error',
+            'message': f'Product finalization timed out: {str(e)}'
+        }, status=504)
+
     except Exception as e:
         logger.error(f'Error finalizing product: {str(e)}', exc_info=True)
         return JsonResponse({
@@ -182,19 +414,30 @@ def finalize_product_view(request, product_id):
             'message': f'Failed to finalize product: {str(e)}'
         }, status=500)
 
+    finally:
+        # The agent may have updated the product even if the run failed
+        await cache.adelete(PRODUCTS_LIST_CACHE_KEY)
+
 
+@require_product
+@etag(_summary_etag)
 def summary(request, product_id):
     """View to display the summary after accepting recommendations."""
-    product = product_service.get_product_by_id(product_id)
-    if not product:
-        raise Http404("Product not found")
-
     # Get the summarization from the SummarizationService
-    from ally.services.summarization_service import summarization_service
     summarization = summarization_service.get_summarization(product_id)
 
-    context = {
-        'product': product,
-        'summarization': summarization
-    }
-    return render(request, 'ally/summary.html', context)
+    # The body and its ETag both come from this read, even if the summarization
+    # changed since the conditional GET check
+    page_etag = _page_etag(request.product, summarization)
+
+    def render_page():
+        context = {
+            'product': request.product,
+            'summarization': summarization
+        }
+        return render_to_string('ally/summary.html', context)
+
+    html = cache.get_or_set(_summary_cache_key(product_id, page_etag), render_page, SUMMARY_CACHE_TIMEOUT)
+    response = HttpResponse(html)
+    response['ETag'] = quote_etag(page_etag)
+    return response